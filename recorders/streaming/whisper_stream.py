@@ -7,29 +7,85 @@ Outputs JSON events to stdout for Hammerspoon integration.
 
 import sys
 import json
-import argparse
+import importlib.util
+import os
+import queue
+import selectors
 import time
 import signal
 import socket
+import struct
+import tempfile
 import threading
 import numpy as np
+from datetime import datetime
 from pathlib import Path
 
+try:
+    import orjson  # Optional: faster JSON encoding for events
+except ImportError:
+    orjson = None
+
 
 # === Configuration Constants ===
 SILENCE_AMPLITUDE_THRESHOLD = 0.01
+SILENCE_SCAN_TILE_SAMPLES = 4096  # Tile size for early-exit silence scan
+INT16_CONVERT_TILE_SAMPLES = 65536  # Tile size for float -> int16 conversion
+CHUNK_BUFFER_SLACK_SECONDS = 1.0  # Room past max_chunk_duration for the block that crosses it
+WAV_WRITE_QUEUE_SIZE = 4  # Chunks waiting for the writer thread before saving blocks
+WAV_MAX_DATA_BYTES = 2**31 - 1 - 36  # Keep RIFF sizes within a signed 32-bit range
+AUDIO_BLOCK_SECONDS = 0.5  # Microphone block length seen by audio_callback
+AUDIO_QUEUE_BLOCKS = 16  # Microphone blocks waiting for processing before new ones are dropped
+AUDIO_FLUSH_TIMEOUT = 0.5  # Max wait at stop for the callback to hand over its partial block
+AUDIO_DRAIN_TIMEOUT = 5.0  # Max wait at stop for queued blocks to be processed
 PERFECT_SILENCE_DURATION_AT_START = 2.0  # Detect mic off at recording start
 VAD_SPEECH_THRESHOLD = 0.25  # Lower threshold = more aggressive speech detection
 VAD_WINDOW_SECONDS = 0.5
+VAD_WINDOW_SAMPLES = 512  # Silero VAD requires exactly 512 samples at 16kHz
 VAD_CONSECUTIVE_SILENCE_REQUIRED = 2  # Require 2 consecutive silence detections (1.0s) before considering it real silence
+VAD_SKIP_AMPLITUDE = 0.005  # Windows quieter than this are silence without running the model (0 disables)
+VAD_SKIP_MAX_SECONDS = 1.0  # Run the model at least this often even on quiet windows
+SILERO_ONNX_CONTEXT_SAMPLES = 64  # Samples carried over between ONNX VAD calls at 16kHz
+SILERO_ONNX_STATE_SIZE = 128
 
 
 # === Event Output ===
 
+def _json_default(obj):
+    """Convert numpy scalars for the stdlib json fallback (orjson does this natively)."""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(obj):
+    """Encode obj as UTF-8 JSON bytes (orjson if installed, else json)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_json_default).encode('utf-8')
+
+
+def _loads(data):
+    """Decode one JSON document from bytes (orjson if installed, else json)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 def output_event(event_type, **kwargs):
     """Output a JSON event to stdout."""
     event = {"type": event_type, **kwargs}
-    print(json.dumps(event), flush=True)
+    # Same encoder as TCPServer.send_event; the buffered writer joins the
+    # payload and newline, so they are not concatenated here
+    out = getattr(sys.stdout, 'buffer', None)
+    if out is None:
+        # Replaced by a plain text stream (redirect_stdout, embedding hosts)
+        sys.stdout.write(_dumps(event).decode('utf-8') + "\n")
+        sys.stdout.flush()
+        return
+    out.write(_dumps(event))
+    out.write(b"\n")
+    out.flush()
 
 
 def output_error(error_msg):
@@ -43,6 +99,25 @@ def output_debug(msg):
 
 # === TCP Server ===
 
+_HAS_SENDMSG = hasattr(socket.socket, 'sendmsg')
+
+# Kernel buffer requested for the client socket, so a slow client (e.g.
+# Hammerspoon busy transcribing) doesn't block sends from the audio path
+SOCKET_BUFFER_BYTES = 4 * 1024 * 1024
+
+
+def _send_buffers(sock, buffers):
+    """Send buffers in order with one sendmsg() call where supported.
+
+    A short write is finished with sendall() on the unsent tail.
+    """
+    if not _HAS_SENDMSG:
+        sock.sendall(b"".join(buffers))
+        return
+    sent = sock.sendmsg(buffers)
+    if sent < sum(len(buf) for buf in buffers):
+        sock.sendall(b"".join(buffers)[sent:])
+
 class TCPServer:
     """TCP server for sending events to Hammerspoon client."""
 
@@ -54,15 +129,44 @@ class TCPServer:
         self.client_socket = None
         self.port = port
 
-    def wait_for_client(self, timeout=10):
-        """Accept single client connection with timeout."""
+        # Received bytes land in one reusable buffer; incomplete lines wait
+        # in _rx_pending until their newline arrives
+        self._rx_buffer = memoryview(bytearray(4096))
+        self._rx_pending = bytearray()
+
+        # receive_command blocks in one select() on the client socket and a
+        # wakeup socket, so other threads can end the wait early via wake()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+        self._selected_client = None
+
+        # Events come from the command loop, audio callback and WAV writer threads
+        self._send_lock = threading.Lock()
+
+    def _accept_client(self, timeout):
+        """Accept one client, returning False on timeout."""
         self.server_socket.settimeout(timeout)
         try:
             self.client_socket, addr = self.server_socket.accept()
-            self.client_socket.settimeout(None)  # Blocking mode for send
-            return True
         except socket.timeout:
             return False
+        self._rx_pending.clear()
+        self.client_socket.settimeout(None)  # Blocking mode for send
+        # Events are small writes; don't let Nagle hold them back
+        self.client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        for option in (socket.SO_SNDBUF, socket.SO_RCVBUF):
+            try:
+                self.client_socket.setsockopt(socket.SOL_SOCKET, option, SOCKET_BUFFER_BYTES)
+            except OSError:
+                pass  # Above the system limit (macOS kern.ipc.maxsockbuf): keep the default
+        return True
+
+    def wait_for_client(self, timeout=10):
+        """Accept single client connection with timeout."""
+        return self._accept_client(timeout)
 
     def send_event(self, event_type, **kwargs):
         """Send JSON event with newline delimiter.
@@ -71,46 +175,87 @@ class TCPServer:
         """
         if self.client_socket:
             event = {"type": event_type, **kwargs}
-            message = json.dumps(event) + "\n"
             try:
-                self.client_socket.sendall(message.encode('utf-8'))
+                # JSON and delimiter go out as two iovecs, no concatenation
+                payload = _dumps(event)
+                with self._send_lock:
+                    _send_buffers(self.client_socket, [payload, b"\n"])
                 return True
             except (BrokenPipeError, ConnectionResetError, OSError):
                 # Client disconnected
                 return False
         return True
 
+    def _pop_command(self):
+        """Return the next complete JSON command buffered so far, or None."""
+        pending = self._rx_pending
+        while True:
+            end = pending.find(b"\n")
+            if end < 0:
+                return None
+            line = bytes(pending[:end]).strip()
+            del pending[:end + 1]
+            if line:
+                try:
+                    return _loads(line)
+                except ValueError:
+                    pass
+
+    def wake(self):
+        """End a receive_command() wait in progress (callable from any thread)."""
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass  # Buffer full: a wakeup is already pending
+
+    def _select_client(self):
+        """Keep the selector watching the current client socket."""
+        if self._selected_client is not None:
+            self._selector.unregister(self._selected_client)
+        self._selector.register(self.client_socket, selectors.EVENT_READ)
+        self._selected_client = self.client_socket
+
     def receive_command(self, timeout=0.1):
-        """Receive a command from client (non-blocking).
+        """Receive a command from client, waiting up to timeout seconds.
 
+        Commands that arrive together are returned one per call, and a line
+        split across reads is kept until it is complete. The wait ends early
+        if wake() is called (timeout=None waits for a command or a wakeup).
         Returns command dict if received, None otherwise.
         """
         if not self.client_socket:
             return None
 
-        try:
-            self.client_socket.settimeout(timeout)
-            data = self.client_socket.recv(1024)
-            if not data:
-                # Client disconnected
-                return {'command': 'disconnect'}
+        command = self._pop_command()
+        if command is not None:
+            return command
 
-            # Parse JSON command (newline-delimited)
-            for line in data.decode('utf-8').split('\n'):
-                line = line.strip()
-                if line:
-                    try:
-                        return json.loads(line)
-                    except json.JSONDecodeError:
+        if self.client_socket is not self._selected_client:
+            self._select_client()
+        readable = False
+        for key, _ in self._selector.select(timeout):
+            if key.fileobj is self._wake_r:
+                try:
+                    while self._wake_r.recv(64):
                         pass
-        except socket.timeout:
-            # No data available (normal)
+                except BlockingIOError:
+                    pass
+            else:
+                readable = True
+        if not readable:
             return None
+
+        try:
+            n = self.client_socket.recv_into(self._rx_buffer)
+            if not n:
+                # Client disconnected
+                return {'command': 'disconnect'}
+            self._rx_pending += self._rx_buffer[:n]
         except (ConnectionResetError, BrokenPipeError):
             # Client disconnected
             return {'command': 'disconnect'}
 
-        return None
+        return self._pop_command()
 
     def wait_for_reconnect(self, timeout=None):
         """Wait for a new client connection after previous client disconnected.
@@ -125,13 +270,7 @@ class TCPServer:
                 pass
             self.client_socket = None
 
-        self.server_socket.settimeout(timeout)
-        try:
-            self.client_socket, addr = self.server_socket.accept()
-            self.client_socket.settimeout(None)
-            return True
-        except socket.timeout:
-            return False
+        return self._accept_client(timeout)
 
     def close(self):
         """Close server and client sockets."""
@@ -146,39 +285,40 @@ class TCPServer:
                 self.server_socket.close()
             except:
                 pass
+        self._selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
 
 
 # === Dependency Checking ===
 
-def check_dependencies():
-    """Check if all required dependencies are installed."""
-    missing = []
-
+def _module_available(name, find_spec=importlib.util.find_spec):
+    """Check whether a module can be imported without importing it."""
     try:
-        import sounddevice
-    except ImportError:
-        missing.append("sounddevice (install: pip install sounddevice)")
+        return find_spec(name) is not None
+    except ValueError:
+        # Already imported without a __spec__ (e.g. injected into sys.modules)
+        return True
 
-    has_torch = False
-    has_onnx = False
-    try:
-        import torch
-        has_torch = True
-    except ImportError:
-        pass
 
-    try:
-        import onnxruntime
-        has_onnx = True
-    except ImportError:
-        pass
+def check_dependencies(find_spec=importlib.util.find_spec):
+    """Check if all required dependencies are installed.
+
+    Uses import specs only, so torch and friends are not loaded at startup.
+    find_spec can be replaced to simulate missing modules in tests.
+    """
+    missing = []
+
+    def available(name):
+        return _module_available(name, find_spec)
 
-    if not has_torch and not has_onnx:
+    if not available('sounddevice'):
+        missing.append("sounddevice (install: pip install sounddevice)")
+
+    if not available('torch') and not available('onnxruntime'):
         missing.append("torch or onnxruntime (install: pip install torch OR pip install onnxruntime)")
 
-    try:
-        import scipy.io.wavfile
-    except ImportError:
+    if not available('scipy'):
         missing.append("scipy (install: pip install scipy)")
 
     return missing
@@ -186,29 +326,387 @@ def check_dependencies():
 
 # === Audio Processing Helpers ===
 
+# float32 scale factors, so int16 <-> float conversions stay in float32
+_INV_INT16 = np.float32(1.0 / 32768.0)
+_INT16_MAX_F = np.float32(32767.0)
+
 def normalize_audio(audio_chunk):
-    """Normalize audio to float32 [-1, 1] range."""
+    """Normalize audio to float32 [-1, 1] range.
+
+    Contiguous float32 input is returned as-is (no copy). Strided views
+    are made contiguous first so NumPy can use its SIMD loops.
+    """
+    if not audio_chunk.flags.c_contiguous:
+        audio_chunk = np.ascontiguousarray(audio_chunk)
+    if audio_chunk.dtype == np.float32:
+        return audio_chunk
     if audio_chunk.dtype == np.int16:
-        return audio_chunk.astype(np.float32) / 32768.0
+        # Cast and scale in a single pass, no float64 temporary
+        out = np.empty(audio_chunk.shape, dtype=np.float32)
+        return np.multiply(audio_chunk, _INV_INT16, out=out)
     return audio_chunk.astype(np.float32)
 
 
+def _scan_silence(buf, threshold):
+    """Return True if no sample in buf reaches +/-threshold.
+
+    Plain loop body for the optional Numba kernel (see _get_silence_kernel).
+    """
+    for i in range(buf.shape[0]):
+        v = buf[i]
+        if v >= threshold or v <= -threshold:
+            return False
+    return True
+
+
+# SILENCE_AMPLITUDE_THRESHOLD in raw int16 sample units
+_INT16_SILENCE_THRESHOLD = SILENCE_AMPLITUDE_THRESHOLD * 32768
+
+_silence_kernel = None
+
+
+def _get_silence_kernel():
+    """Compile _scan_silence with Numba on first use (None if unavailable)."""
+    global _silence_kernel
+    if _silence_kernel is None:
+        try:
+            from numba import njit
+            _silence_kernel = njit(cache=True, boundscheck=False)(_scan_silence)
+        except ImportError:
+            _silence_kernel = False
+    return _silence_kernel or None
+
+
+def _warm_up_silence_kernel():
+    """Compile the Numba kernel for float32 and int16 input ahead of time.
+
+    Keeps JIT compilation (or loading it from Numba's cache) out of the
+    first audio callbacks. Does nothing without numba.
+    """
+    kernel = _get_silence_kernel()
+    if kernel is not None:
+        kernel(np.zeros(1, dtype=np.float32), SILENCE_AMPLITUDE_THRESHOLD)
+        kernel(np.zeros(1, dtype=np.int16), _INT16_SILENCE_THRESHOLD)
+
+
 def is_perfect_silence(audio_chunk):
-    """Check if audio is essentially zero (microphone off)."""
-    audio_float = normalize_audio(audio_chunk)
-    max_amplitude = np.max(np.abs(audio_float))
-    return max_amplitude < SILENCE_AMPLITUDE_THRESHOLD
+    """Check if audio is essentially zero (microphone off).
+
+    Uses a Numba scan-and-break kernel when numba is installed. Otherwise
+    long buffers are scanned in tiles so a loud sample near the start
+    returns early. Each tile is checked with max() and min() against a
+    threshold scaled to the input dtype, so nothing is normalized or
+    written to a temporary abs() array.
+    """
+    kernel = _get_silence_kernel()
+    if kernel is not None and audio_chunk.dtype in (np.float32, np.int16):
+        threshold = SILENCE_AMPLITUDE_THRESHOLD
+        if audio_chunk.dtype == np.int16:
+            threshold = _INT16_SILENCE_THRESHOLD
+        return kernel(np.ascontiguousarray(audio_chunk).reshape(-1), threshold)
+
+    if audio_chunk.dtype == np.int16:
+        threshold = _INT16_SILENCE_THRESHOLD
+    else:
+        if audio_chunk.dtype.kind != 'f':
+            audio_chunk = normalize_audio(audio_chunk)
+        threshold = SILENCE_AMPLITUDE_THRESHOLD
+    for start in range(0, len(audio_chunk), SILENCE_SCAN_TILE_SAMPLES):
+        tile = audio_chunk[start:start + SILENCE_SCAN_TILE_SAMPLES]
+        if tile.max() >= threshold or tile.min() <= -threshold:
+            return False
+    return True
 
 
 def convert_to_int16(audio_data):
-    """Convert audio to int16 format for WAV file."""
+    """Convert audio to int16 format for WAV file.
+
+    Float input is clipped to [-1, 1] so out-of-range samples saturate
+    instead of wrapping around. It is clipped in tiles of
+    INT16_CONVERT_TILE_SAMPLES into one small float32 scratch buffer, and
+    the scale is written straight into the int16 output (the cast is
+    fused into the multiply), so no float copy of the whole input is made.
+    """
+    if not audio_data.flags.c_contiguous:
+        audio_data = np.ascontiguousarray(audio_data)
     if audio_data.dtype == np.float32 or audio_data.dtype == np.float64:
-        return (audio_data * 32767).astype(np.int16)
+        out = np.empty(audio_data.shape, dtype=np.int16)
+        scratch = np.empty(min(len(audio_data), INT16_CONVERT_TILE_SAMPLES), dtype=np.float32)
+        for start in range(0, len(audio_data), INT16_CONVERT_TILE_SAMPLES):
+            tile = audio_data[start:start + INT16_CONVERT_TILE_SAMPLES]
+            _scale_into_int16(tile, out[start:start + len(tile)], scratch)
+        return out
     return audio_data
 
 
+def _scale_into_int16(samples, out, scratch):
+    """Clip float samples to [-1, 1] and scale them into the int16 array out.
+
+    scratch is a float32 array at least len(samples) long.
+    """
+    tmp = scratch[:len(samples)]
+    np.clip(samples, -1.0, 1.0, out=tmp)
+    np.multiply(tmp, _INT16_MAX_F, out=out, casting='unsafe')
+
+
+class AudioBuffer:
+    """Growable contiguous sample buffer (float32, or int16 PCM).
+
+    append() copies into preallocated storage and doubles the capacity
+    when it runs out, so view() is always one contiguous array and no
+    concatenation is needed. clear() keeps the storage for reuse.
+    An int16 buffer converts float samples as they are appended, the
+    same way convert_to_int16 does.
+    """
+
+    def __init__(self, capacity, dtype=np.float32):
+        self._data = np.empty(max(int(capacity), 1), dtype=dtype)
+        self._size = 0
+        self._scratch = np.empty(0, dtype=np.float32)  # For int16 conversion
+
+    def __len__(self):
+        return self._size
+
+    def append(self, samples):
+        """Copy samples onto the end of the buffer."""
+        n = len(samples)
+        end = self._size + n
+        if end > len(self._data):
+            grown = np.empty(max(end, 2 * len(self._data)), dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        if self._data.dtype == np.int16 and samples.dtype != np.int16:
+            if len(self._scratch) < n:
+                self._scratch = np.empty(n, dtype=np.float32)
+            _scale_into_int16(samples, self._data[self._size:end], self._scratch)
+        else:
+            self._data[self._size:end] = samples
+        self._size = end
+
+    def view(self):
+        """Buffered samples as a view (valid until the next append or clear)."""
+        return self._data[:self._size]
+
+    def clear(self):
+        """Drop all samples, keeping the allocated storage."""
+        self._size = 0
+
+
+class AudioBlockRing:
+    """Single-producer/single-consumer ring of preallocated audio blocks.
+
+    append() packs samples of any length into full block_size slots and
+    never blocks; it drops samples (and returns how many) when the
+    consumer is a whole ring behind. Each index is only advanced by its own side, so the
+    slots need no lock; a semaphore counts filled slots to wake the
+    consumer.
+    """
+
+    def __init__(self, slots, block_size):
+        self._slots = np.zeros((slots, block_size), dtype=np.float32)
+        self._lengths = [0] * slots
+        self._status = [None] * slots
+        self._write = 0
+        self._read = 0
+        self._fill = 0  # Samples appended to the slot not yet handed over
+        self._fill_status = None
+        self._flush_requested = threading.Event()
+        self._flushed = threading.Event()
+        self._filled = threading.Semaphore(0)
+        self._consumed = threading.Condition()
+
+    def append(self, samples, status=None):
+        """Pack samples into slots, handing each over once full (producer side).
+
+        Lets the audio callback take whatever block size the device
+        prefers while the consumer still sees block_size blocks. Returns
+        the number of samples dropped because the ring was full (0 if none).
+        """
+        n_slots, size = self._slots.shape
+        if status:
+            self._fill_status = status
+        pos = 0
+        while pos < len(samples):
+            if self._write - self._read >= n_slots:
+                return len(samples) - pos
+            i = self._write % n_slots
+            fill = self._fill
+            take = min(size - fill, len(samples) - pos)
+            self._slots[i, fill:fill + take] = samples[pos:pos + take]
+            pos += take
+            fill += take
+            if fill == size:
+                self._lengths[i] = size
+                self._status[i] = self._fill_status
+                self._fill_status = None
+                fill = 0
+                self._write += 1
+                self._filled.release()
+            self._fill = fill
+        if self._flush_requested.is_set():
+            self._hand_over_partial()
+        return 0
+
+    def _hand_over_partial(self):
+        """Publish the partly filled slot, trimmed to its fill (producer side)."""
+        self._flush_requested.clear()
+        if self._fill and self._write - self._read < len(self._slots):
+            i = self._write % len(self._slots)
+            self._lengths[i] = self._fill
+            self._status[i] = self._fill_status
+            self._write += 1
+            self._filled.release()
+        self.discard_partial()
+        self._flushed.set()
+
+    def flush(self, timeout=None):
+        """Have the producer hand over its partial slot on its next append().
+
+        Returns False if the producer did not append within timeout.
+        """
+        self._flushed.clear()
+        self._flush_requested.set()
+        return self._flushed.wait(timeout)
+
+    def discard_partial(self):
+        """Drop samples appended since the last full slot (producer side)."""
+        self._fill = 0
+        self._fill_status = None
+        self._flush_requested.clear()
+
+    def pop(self, timeout=None):
+        """Return (samples, status) for the oldest block, or None on timeout.
+
+        samples is a view into the slot, valid until release().
+        """
+        if not self._filled.acquire(timeout=timeout):
+            return None
+        i = self._read % len(self._slots)
+        return self._slots[i, :self._lengths[i]], self._status[i]
+
+    def release(self):
+        """Hand the popped slot back to the producer (consumer side)."""
+        with self._consumed:
+            self._read += 1
+            self._consumed.notify_all()
+
+    def drain(self, timeout=None):
+        """Wait until every block handed over so far has been released."""
+        target = self._write
+        with self._consumed:
+            return self._consumed.wait_for(lambda: self._read >= target, timeout)
+
+
+# === WAV Output ===
+
+# Canonical 44-byte header for mono 16-bit PCM
+_WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+
+
+def _wav_header(sample_rate, data_size):
+    """Pack the 44-byte header of a mono 16-bit PCM WAV file."""
+    return _WAV_HEADER.pack(b'RIFF', 36 + data_size, b'WAVE',
+                            b'fmt ', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+                            b'data', data_size)
+
+
+def write_pcm16_wav(path, sample_rate, pcm16):
+    """Write mono int16 samples as a PCM WAV file.
+
+    The fixed header is packed with struct and the samples are written
+    straight from the array's buffer.
+    """
+    data = np.ascontiguousarray(pcm16, dtype='<i2')
+    with open(path, 'wb') as f:
+        f.write(_wav_header(sample_rate, data.nbytes))
+        f.write(data.data)
+
+
+class PcmWavWriter:
+    """Mono int16 PCM WAV file written incrementally.
+
+    Samples are appended as they arrive; the header sizes are filled in
+    on close, so the whole recording never has to be held in memory.
+    The file stops growing at max_data_bytes (2 GB by default), since
+    many readers treat the RIFF sizes as signed.
+    """
+
+    def __init__(self, path, sample_rate, max_data_bytes=WAV_MAX_DATA_BYTES):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.data_size = 0
+        self.max_data_bytes = max_data_bytes - max_data_bytes % 2
+        self._file = open(path, 'wb')
+        self._file.write(_wav_header(sample_rate, 0))
+
+    def write(self, pcm16):
+        """Append int16 samples.
+
+        Returns False if the size limit cut off some or all of them.
+        """
+        data = np.ascontiguousarray(pcm16, dtype='<i2')
+        room = (self.max_data_bytes - self.data_size) // 2
+        complete = len(data) <= room
+        if not complete:
+            data = data[:room]
+        self._file.write(data.data)
+        self.data_size += data.nbytes
+        return complete
+
+    def close(self):
+        """Fill in the header sizes and close the file."""
+        if self._file.closed:
+            return
+        self._file.seek(0)
+        self._file.write(_wav_header(self.sample_rate, self.data_size))
+        self._file.close()
+
+
 # === File Audio Source (for testing) ===
 
+def _memmap_pcm16_wav(path):
+    """Memory-map the samples of a 16-bit PCM WAV file.
+
+    Returns (sample_rate, int16 samples), shaped (frames, channels) for
+    multi-channel files, or None if the file is not plain 16-bit PCM.
+    """
+    with open(path, 'rb') as f:
+        riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave_id != b'WAVE':
+            return None
+
+        # Walk the RIFF chunks up to the sample data
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            chunk_id, size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                fmt = struct.unpack('<HHIIHH', f.read(16))
+                f.seek(size - 16 + (size & 1), 1)
+            elif chunk_id == b'data':
+                offset = f.tell()
+                size = min(size, f.seek(0, 2) - offset)
+                break
+            else:
+                f.seek(size + (size & 1), 1)
+
+    if fmt is None:
+        return None
+    format_tag, channels, sample_rate, _, _, bits = fmt
+    if format_tag != 1 or bits != 16:  # WAVE_FORMAT_PCM only
+        return None
+
+    frames = size // (2 * channels)
+    if frames == 0:
+        return sample_rate, np.zeros(0, dtype=np.int16)
+    data = np.memmap(path, dtype='<i2', mode='r', offset=offset, shape=(frames * channels,))
+    if channels > 1:
+        data = data.reshape(frames, channels)
+    return sample_rate, data
+
+
 class FileAudioSource:
     """Simulates real-time audio streaming from a WAV file for testing."""
 
@@ -221,34 +719,46 @@ class FileAudioSource:
             sample_rate: Expected sample rate (will resample if needed)
             chunk_duration: Duration of each chunk in seconds (matches sounddevice blocksize)
         """
-        import scipy.io.wavfile
-
         self.file_path = Path(file_path)
         if not self.file_path.exists():
             raise FileNotFoundError(f"Test audio file not found: {file_path}")
 
-        # Load audio file
-        file_sr, audio_data = scipy.io.wavfile.read(str(self.file_path))
-
-        # Convert to float32 [-1, 1] range
-        audio_data = normalize_audio(audio_data)
+        # 16-bit PCM is memory-mapped instead of read into memory; any other
+        # format is read by scipy and converted to float32 up front
+        loaded = _memmap_pcm16_wav(self.file_path)
+        if loaded is None:
+            import scipy.io.wavfile
+            file_sr, audio_data = scipy.io.wavfile.read(str(self.file_path))
+            audio_data = normalize_audio(audio_data)
+        else:
+            file_sr, audio_data = loaded
 
         # Handle stereo -> mono conversion
         if len(audio_data.shape) > 1:
             audio_data = audio_data[:, 0]  # Take first channel
 
-        # Resample if needed
+        # Resample if needed (polyphase FIR: linear time, no whole-file FFT)
         if file_sr != sample_rate:
+            from math import gcd
             from scipy import signal
-            num_samples = int(len(audio_data) * sample_rate / file_sr)
-            audio_data = signal.resample(audio_data, num_samples)
-
-        self.audio_data = audio_data.astype(np.float32)
+            audio_data = normalize_audio(audio_data)
+            g = gcd(file_sr, sample_rate)
+            audio_data = signal.resample_poly(audio_data, sample_rate // g, file_sr // g)
+            audio_data = audio_data.astype(np.float32, copy=False)
+        elif audio_data.dtype != np.int16:
+            audio_data = normalize_audio(audio_data)
+
+        # int16 data stays memory-mapped and is normalized per chunk
+        self.audio_data = audio_data
         self.sample_rate = sample_rate
         self.chunk_size = int(sample_rate * chunk_duration)
         self.position = 0
         self.chunk_duration = chunk_duration
 
+        # Full chunks as (n, chunk_size, 1) views into audio_data
+        n_chunks = len(audio_data) // self.chunk_size
+        self._chunks = audio_data[:n_chunks * self.chunk_size].reshape(n_chunks, self.chunk_size, 1)
+
     def read_chunk(self):
         """
         Read next chunk of audio data.
@@ -259,17 +769,18 @@ class FileAudioSource:
         if self.position >= len(self.audio_data):
             return None
 
-        # Extract chunk
-        end_pos = min(self.position + self.chunk_size, len(self.audio_data))
-        chunk = self.audio_data[self.position:end_pos]
-        self.position = end_pos
-
-        # Pad last chunk if needed
-        if len(chunk) < self.chunk_size:
-            chunk = np.pad(chunk, (0, self.chunk_size - len(chunk)), mode='constant')
+        # Full chunks are precomputed views (float32 data is not copied)
+        index = self.position // self.chunk_size
+        if index < len(self._chunks):
+            self.position += self.chunk_size
+            return normalize_audio(self._chunks[index])
 
-        # Return as (N, 1) shape to match sounddevice format
-        return chunk.reshape(-1, 1)
+        # Pad last chunk, shaped (N, 1) to match sounddevice format
+        tail = normalize_audio(self.audio_data[self.position:])
+        self.position = len(self.audio_data)
+        chunk = np.zeros((self.chunk_size, 1), dtype=np.float32)
+        chunk[:len(tail), 0] = tail
+        return chunk
 
     def stream_to_callback(self, callback, simulate_realtime=True):
         """
@@ -293,6 +804,196 @@ class FileAudioSource:
                 time.sleep(self.chunk_duration)
 
 
+# === Silero VAD (ONNX Runtime) ===
+
+# Optional models/ directory next to this script for a pre-downloaded model
+SILERO_MODEL_DIR = Path(__file__).resolve().parent / 'models'
+
+# Fetched when ONNX Runtime is installed without torch (pinned release)
+SILERO_ONNX_URL = ('https://raw.githubusercontent.com/snakers4/silero-vad/'
+                   'v5.1.2/src/silero_vad/data/silero_vad.onnx')
+SILERO_ONNX_SHA256 = '2623a2953f6ff3d2c1e61740c6cdb7168133479b267dfef114a4a3cc5bdd788f'
+SILERO_DOWNLOAD_TIMEOUT = 30.0  # Seconds without data before the model download fails
+
+
+def _cache_home():
+    """User cache directory ($XDG_CACHE_HOME or ~/.cache)."""
+    return os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache'))
+
+
+def _find_silero_model(filename, env_var):
+    """Locate a Silero VAD model file without importing torch.
+
+    Checks env_var, then SILERO_MODEL_DIR, then the copy torch.hub keeps
+    in its cache, then our own download cache. Returns a Path, or None
+    if no model file is present.
+    """
+    override = os.environ.get(env_var)
+    if override:
+        return Path(override)
+    torch_home = os.environ.get('TORCH_HOME') or os.path.join(_cache_home(), 'torch')
+    for model_path in (SILERO_MODEL_DIR / filename,
+                       Path(torch_home) / 'hub' / 'snakers4_silero-vad_master'
+                       / 'src' / 'silero_vad' / 'data' / filename,
+                       Path(_cache_home()) / 'silero-vad' / filename):
+        if model_path.exists():
+            return model_path
+    return None
+
+
+def _download_silero_onnx_model():
+    """Download silero_vad.onnx into the cache and return its path.
+
+    The file must match SILERO_ONNX_SHA256; otherwise, or if the download
+    fails, nothing is left in the cache and the error is raised.
+    """
+    import hashlib
+    import urllib.request
+    target = Path(_cache_home()) / 'silero-vad' / 'silero_vad.onnx'
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_suffix('.part')
+    try:
+        digest = hashlib.sha256()
+        with urllib.request.urlopen(SILERO_ONNX_URL, timeout=SILERO_DOWNLOAD_TIMEOUT) as response, \
+                open(partial, 'wb') as f:
+            while block := response.read(1 << 16):
+                digest.update(block)
+                f.write(block)
+        if digest.hexdigest() != SILERO_ONNX_SHA256:
+            raise ValueError(f"Checksum mismatch for downloaded {SILERO_ONNX_URL}")
+        os.replace(partial, target)  # Never leave a truncated model behind
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    return target
+
+
+def _find_silero_onnx_model():
+    """Locate silero_vad.onnx ($SILERO_VAD_ONNX overrides)."""
+    return _find_silero_model('silero_vad.onnx', 'SILERO_VAD_ONNX')
+
+
+def _find_silero_jit_model():
+    """Locate the TorchScript silero_vad.jit ($SILERO_VAD_JIT overrides)."""
+    return _find_silero_model('silero_vad.jit', 'SILERO_VAD_JIT')
+
+
+class OnnxSileroVAD:
+    """Silero VAD running on an ONNX Runtime session.
+
+    Called like the torch model, model(audio, sample_rate), but takes and
+    returns numpy arrays. Recurrent state and the trailing context samples
+    are kept between calls, as in Silero's own OnnxWrapper. The model input
+    (context + window) lives in one preallocated array that is updated in
+    place on every call.
+
+    When the session supports IOBinding, the input, state, sample rate and
+    outputs are bound once to those fixed arrays, so a call only copies
+    the window in and runs. The returned array is then reused by the next
+    call.
+    """
+
+    accepts_numpy = True
+
+    def __init__(self, session):
+        self.session = session
+        self._sr = {}
+        self._use_binding = hasattr(session, 'io_binding')
+        self.reset_states()
+
+    @staticmethod
+    def optimized_path(model_path):
+        """Where the fused graph for model_path is cached (next to it)."""
+        model_path = Path(model_path)
+        return model_path.with_name(model_path.stem + '.opt.onnx')
+
+    @classmethod
+    def load(cls, model_path):
+        """Create a single-threaded, fully optimized CPU session for model_path.
+
+        The first load saves ORT's fused graph next to the model; later
+        loads use that file with graph optimization turned off, so
+        startup skips the optimization passes.
+        """
+        import onnxruntime as ort
+
+        def session(path, level, save_to=None):
+            opts = ort.SessionOptions()
+            # A 512-sample model is too small to benefit from thread pools
+            opts.intra_op_num_threads = 1
+            opts.inter_op_num_threads = 1
+            opts.graph_optimization_level = level
+            if save_to is not None:
+                opts.optimized_model_filepath = str(save_to)
+            return ort.InferenceSession(str(path), sess_options=opts,
+                                        providers=['CPUExecutionProvider'])
+
+        model_path = Path(model_path)
+        cached = cls.optimized_path(model_path)
+        try:
+            if cached.exists() and cached.stat().st_mtime >= model_path.stat().st_mtime:
+                return cls(session(cached, ort.GraphOptimizationLevel.ORT_DISABLE_ALL))
+            return cls(session(model_path, ort.GraphOptimizationLevel.ORT_ENABLE_ALL, cached))
+        except Exception:
+            # Stale/unreadable cache or read-only model directory
+            return cls(session(model_path, ort.GraphOptimizationLevel.ORT_ENABLE_ALL))
+
+    def reset_states(self, batch_size=1):
+        """Clear recurrent state and context for a new stream."""
+        self._batch_size = batch_size
+        self._state = np.zeros((2, batch_size, SILERO_ONNX_STATE_SIZE), dtype=np.float32)
+        # Context samples sit in the first SILERO_ONNX_CONTEXT_SAMPLES columns
+        self._input = None
+        self._binding = None  # Rebound to the new arrays on the next call
+
+    def _bind(self, sr):
+        """Bind the input, state, sr and output arrays to a new IOBinding."""
+        io = self.session.io_binding()
+        self._output = np.empty((self._batch_size, 1), dtype=np.float32)
+        self._state_out = np.empty_like(self._state)
+        output_name, state_name = (output.name for output in self.session.get_outputs())
+        for name, array in (('input', self._input), ('state', self._state), ('sr', sr)):
+            io.bind_input(name, 'cpu', 0, array.dtype.type, array.shape, array.ctypes.data)
+        for name, array in ((output_name, self._output), (state_name, self._state_out)):
+            io.bind_output(name, 'cpu', 0, array.dtype.type, array.shape, array.ctypes.data)
+        self._binding = io
+        self._bound_sr = sr
+
+    def __call__(self, audio, sample_rate):
+        x = audio.reshape(-1, audio.shape[-1]) if audio.ndim > 1 else audio[None, :]
+        if x.shape[0] != self._batch_size:
+            self.reset_states(x.shape[0])
+        sr = self._sr.get(sample_rate)
+        if sr is None:
+            sr = self._sr[sample_rate] = np.array(sample_rate, dtype=np.int64)
+
+        context = SILERO_ONNX_CONTEXT_SAMPLES
+        width = context + x.shape[1]
+        model_input = self._input
+        if model_input is None or model_input.shape[1] != width:
+            resized = np.zeros((x.shape[0], width), dtype=np.float32)
+            if model_input is not None:
+                resized[:, :context] = model_input[:, -context:]
+            model_input = self._input = resized
+            self._binding = None
+        else:
+            # Previous window's tail becomes this call's context
+            model_input[:, :context] = model_input[:, -context:]
+        model_input[:, context:] = x
+
+        if not self._use_binding:
+            out, self._state = self.session.run(
+                None, {'input': model_input, 'state': self._state, 'sr': sr})
+            return out
+
+        if self._binding is None or sr is not self._bound_sr:
+            self._bind(sr)
+        self.session.run_with_iobinding(self._binding)
+        # Outputs must not alias inputs, so the new state is copied back
+        self._state[...] = self._state_out
+        return self._output
+
+
 # === Continuous Recorder ===
 
 class ContinuousRecorder:
@@ -305,10 +1006,17 @@ class ContinuousRecorder:
                  sample_rate=16000,
                  audio_source=None,
                  audio_input_device=None,
-                 perfect_silence_duration=0.0):
+                 perfect_silence_duration=0.0,
+                 vad_batch_size=1,
+                 vad_full_block=False,
+                 vad_hop=VAD_WINDOW_SAMPLES,
+                 vad_skip_amplitude=VAD_SKIP_AMPLITUDE,
+                 vad_model=None):
         self.tcp_server = tcp_server
         self.output_dir = Path(output_dir)
         self.filename_prefix = filename_prefix
+        # Chunk paths are built as str once per chunk from this template
+        self._chunk_path_template = str(self.output_dir / f"{filename_prefix}_chunk_{{:03d}}.wav")
         self.silence_threshold = silence_threshold
         self.min_chunk_duration = min_chunk_duration
         self.max_chunk_duration = max_chunk_duration
@@ -316,14 +1024,50 @@ class ContinuousRecorder:
         self.audio_source = audio_source  # Optional FileAudioSource for testing
         self.audio_input_device = audio_input_device  # Optional audio input device name
         self.perfect_silence_duration = perfect_silence_duration  # Duration to detect mic off (0 to disable)
+        self.vad_batch_size = vad_batch_size  # VAD windows per model call
+        self.vad_full_block = vad_full_block  # Run VAD over every window of each callback
+        self.vad_hop = max(vad_hop, VAD_WINDOW_SAMPLES)  # Samples between full-block VAD windows
+        self.vad_skip_amplitude = vad_skip_amplitude  # Peak below which the model is skipped (0 = never)
 
         # Chunk state
         self.chunk_num = 0
-        self.current_chunk_audio = []
+        # Sized for the longest possible chunk so the audio callback never
+        # reallocates it; pages are only committed as samples are written.
+        # Held as int16 PCM, converted block by block as audio arrives.
+        self.current_chunk_audio = AudioBuffer(
+            (max_chunk_duration + CHUNK_BUFFER_SLACK_SECONDS) * sample_rate, dtype=np.int16)
         self.current_chunk_start_time = None
 
-        # Full recording (all audio for single file save)
-        self.all_audio = []
+        # Ring buffer of the most recent samples for VAD. Every sample is
+        # stored twice (at i and i + VAD_WINDOW_SAMPLES) so the window is
+        # always a contiguous slice starting at the write head.
+        self._vad_ring = np.zeros(2 * VAD_WINDOW_SAMPLES, dtype=np.float32)
+        self._vad_head = 0
+        self._vad_window_filled = 0
+        self._vad_batch = []  # Windows waiting for a batched VAD call
+        self._last_vad_run = float('-inf')  # Recording-clock time of the last model call
+        self._vad_carry = np.empty(0, dtype=np.float32)  # Samples short of a full window
+        # Mid-recording chunks are written by a background thread
+        self._write_queue = queue.Queue(maxsize=WAV_WRITE_QUEUE_SIZE)
+        self._writer_thread = None
+
+        self._vad_runner = None  # Specialized call for _vad_runner_model
+        self._vad_runner_model = None
+
+        # Microphone blocks are queued by _enqueue_audio and processed by
+        # _process_audio_blocks, off the real-time audio thread
+        self._audio_ring = None
+        self._audio_worker = None
+        self._dropped_samples = 0
+
+        # Full recording, streamed to disk as int16 PCM while recording
+        # (opened by _reset_recording_state when a session starts)
+        self._recording_writer = None
+        self._recording_truncated = False
+
+        # Recording clock: seconds of audio received, so durations are
+        # exact to the sample and don't depend on callback timing
+        self._samples_seen = 0
 
         # Silence detection state
         self.silence_start_time = None
@@ -333,17 +1077,68 @@ class ContinuousRecorder:
         self.consecutive_silence_count = 0  # Count consecutive silence detections
 
         # Control
+        self._stopped = threading.Event()  # Backs the running property
+        # Held while a block is processed and while a session starts or is
+        # finalized, so those never interleave on the chunk and file state
+        self._session_lock = threading.RLock()
         self.running = True
         self.recording = False  # Whether currently recording
         self.mic_off = False  # Track if stopped due to mic being off
 
-        # Load VAD model
-        self.vad_model = self._load_vad_model()
+        # Load VAD model unless a preloaded one was passed in
+        self.vad_model = vad_model if vad_model is not None else self._load_vad_model()
+        _warm_up_silence_kernel()
 
-    def _load_vad_model(self):
-        """Load Silero VAD model."""
+    @property
+    def running(self):
+        """False once the server has been asked to stop."""
+        return not self._stopped.is_set()
+
+    @running.setter
+    def running(self, value):
+        if value:
+            self._stopped.clear()
+        else:
+            self._stopped.set()
+            # Don't leave the command loop waiting for a command that may never come
+            wake = getattr(self.tcp_server, 'wake', None)
+            if wake is not None:
+                wake()
+
+    def _wait_unless_stopped(self, seconds):
+        """Sleep for up to seconds, returning early (True) once stopped."""
+        return self._stopped.wait(seconds)
+
+    def _handle_stop_signal(self, signum, frame):
+        """SIGINT/SIGTERM handler: stop the server loop."""
+        self.running = False
+
+    @staticmethod
+    def _load_vad_model():
+        """Load Silero VAD model.
+
+        Uses ONNX Runtime when it is installed and silero_vad.onnx is
+        available locally (or torch is not installed, in which case the
+        ONNX file is downloaded), otherwise the TorchScript model. A local
+        silero_vad.jit is loaded directly; torch.hub (which resolves and
+        imports the hub repo, downloading it the first time) is the fallback.
+        """
         try:
+            if _module_available('onnxruntime'):
+                model_path = _find_silero_onnx_model()
+                if model_path is None and not _module_available('torch'):
+                    model_path = _download_silero_onnx_model()
+                if model_path is not None:
+                    return OnnxSileroVAD.load(model_path)
+
             import torch
+            # Per-call work is tiny, so intra-op threads only add dispatch cost
+            torch.set_num_threads(1)
+            model_path = _find_silero_jit_model()
+            if model_path is not None:
+                model = torch.jit.load(str(model_path), map_location='cpu')
+                model.eval()
+                return model
             model, _ = torch.hub.load(
                 repo_or_dir='snakers4/silero-vad',
                 model='silero_vad',
@@ -356,12 +1151,24 @@ class ContinuousRecorder:
         except Exception as e:
             raise ImportError(f"Failed to load Silero VAD model: {e}")
 
+    def _clock(self):
+        """Current time on the recording clock (seconds of audio received)."""
+        return self._samples_seen / self.sample_rate
+
     def _reset_recording_state(self):
         """Reset state for a new recording session."""
         self.chunk_num = 0
-        self.current_chunk_audio = []
+        self.current_chunk_audio.clear()
         self.current_chunk_start_time = None
-        self.all_audio = []
+        self._vad_window_filled = 0
+        self._vad_batch = []
+        self._vad_carry = self._vad_carry[:0]
+        self._last_vad_run = float('-inf')
+        if self._recording_writer is not None:
+            self._discard_complete_recording()  # Abandoned session, never saved
+        self._recording_writer = self._open_complete_recording()
+        self._recording_truncated = False
+        self._samples_seen = 0
         self.silence_start_time = None
         self.perfect_silence_start_time = None
         self.mic_warning_shown = False
@@ -369,42 +1176,166 @@ class ContinuousRecorder:
         self.mic_off = False
         self.consecutive_silence_count = 0
 
+        # A new session is a new audio stream: drop the VAD's recurrent state.
+        # Within a session the state carries across windows and chunks.
+        reset_states = getattr(self.vad_model, 'reset_states', None)
+        if reset_states is not None:
+            reset_states()
+
+    def _make_vad_runner(self, model):
+        """Build a closure that runs model with the sample rate and input path frozen.
+
+        Models that take numpy arrays (ONNX Runtime) are called directly.
+        Torch models get a single 512-sample window copied into one reused
+        tensor; other shapes are wrapped with torch.from_numpy.
+        """
+        sample_rate = self.sample_rate
+        if getattr(model, 'accepts_numpy', False):
+            return lambda audio_float: model(audio_float, sample_rate)
+
+        import torch
+        window = torch.empty(VAD_WINDOW_SAMPLES, dtype=torch.float32)
+        window_np = window.numpy()
+
+        def run(audio_float):
+            if audio_float.shape == (VAD_WINDOW_SAMPLES,):
+                window_np[:] = audio_float
+                audio_tensor = window
+            else:
+                audio_tensor = torch.from_numpy(audio_float)
+            with torch.inference_mode():
+                return model(audio_tensor, sample_rate)
+        return run
+
+    def _run_vad(self, audio_float):
+        """Call the VAD model on contiguous float32 samples.
+
+        The runner is rebuilt only when vad_model is replaced.
+        """
+        model = self.vad_model
+        if model is not self._vad_runner_model:
+            self._vad_runner = self._make_vad_runner(model)
+            self._vad_runner_model = model
+        return self._vad_runner(audio_float)
+
     def _detect_voice_activity(self, audio_chunk):
-        """Detect if audio chunk contains voice using Silero VAD."""
+        """Detect if audio chunk contains voice using Silero VAD.
+
+        The model input may share memory with audio_chunk, so the caller
+        must not modify it until this returns.
+        """
         try:
-            import torch
             audio_float = normalize_audio(audio_chunk)
-            audio_tensor = torch.from_numpy(audio_float)
-            speech_prob = self.vad_model(audio_tensor, self.sample_rate).item()
+            speech_prob = self._run_vad(audio_float).item()
             return speech_prob > VAD_SPEECH_THRESHOLD
         except Exception as e:
             self.tcp_server.send_event("error", error=f"VAD detection error: {e}")
             return True  # Assume speech to avoid losing audio
 
-    def _save_chunk(self):
-        """Save current chunk audio to WAV file."""
+    def _detect_voice_activity_batch(self, windows):
+        """Run Silero VAD once over a (B, 512) stack of windows."""
+        try:
+            batch = np.ascontiguousarray(windows, dtype=np.float32)
+            speech_probs = self._run_vad(batch).reshape(-1).tolist()
+            return [prob > VAD_SPEECH_THRESHOLD for prob in speech_probs]
+        except Exception as e:
+            self.tcp_server.send_event("error", error=f"VAD detection error: {e}")
+            return [True] * len(windows)  # Assume speech to avoid losing audio
+
+    def _detect_voice_activity_windows(self, audio_chunk):
+        """Run Silero VAD on a 512-sample window every vad_hop samples.
+
+        Each window is the last 512 samples of its hop, so a hop of 1024
+        halves the model calls. Windows are fed in order so the model state
+        follows the audio; samples short of a full hop are carried into the
+        next call. Returns one bool per window (possibly none).
+        """
+        audio = normalize_audio(audio_chunk)
+        if self._vad_carry.size:
+            audio = np.concatenate((self._vad_carry, audio))
+        hop = self.vad_hop
+        usable = len(audio) - len(audio) % hop
+        self._vad_carry = audio[usable:].copy()
+        windows = audio[:usable].reshape(-1, hop)[:, hop - VAD_WINDOW_SAMPLES:]
+        try:
+            speech_probs = np.empty(len(windows), dtype=np.float32)
+            for i, window in enumerate(windows):
+                speech_probs[i] = self._run_vad(window).item()
+            return speech_probs > VAD_SPEECH_THRESHOLD
+        except Exception as e:
+            self.tcp_server.send_event("error", error=f"VAD detection error: {e}")
+            return np.ones(len(windows), dtype=bool)  # Assume speech to avoid losing audio
+
+    def _take_chunk(self, now=None):
+        """Detach the current chunk as int16 samples and start the next one.
+
+        now is the recording-clock time that starts the next chunk.
+        Returns (chunk_file, audio_data), or None if the chunk is empty.
+        """
         if not self.current_chunk_audio:
             return None
 
         self.chunk_num += 1
-        chunk_file = self.output_dir / f"{self.filename_prefix}_chunk_{self.chunk_num:03d}.wav"
+        chunk_file = self._chunk_path_template.format(self.chunk_num)
+
+        # Already int16; the copy lets the buffer be reused at once
+        audio_data = self.current_chunk_audio.view().copy()
+
+        # Reset for next chunk
+        self.current_chunk_audio.clear()
+        self._vad_window_filled = 0
+        self._vad_batch = []
+        self._vad_carry = self._vad_carry[:0]
+        self.current_chunk_start_time = self._clock() if now is None else now
+
+        return chunk_file, audio_data
+
+    def _save_chunk(self, now=None):
+        """Save current chunk audio to WAV file."""
+        taken = self._take_chunk(now)
+        if taken is None:
+            return None
+        chunk_file, audio_data = taken
 
         # Ensure output directory exists
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        write_pcm16_wav(chunk_file, self.sample_rate, audio_data)
 
-        audio_data = np.concatenate(self.current_chunk_audio)
-        audio_data = convert_to_int16(audio_data)
-
-        import scipy.io.wavfile
-        scipy.io.wavfile.write(str(chunk_file), self.sample_rate, audio_data)
+        return chunk_file
 
-        # Reset for next chunk
-        self.current_chunk_audio = []
-        self.current_chunk_start_time = time.time()
+    def _queue_chunk(self, now=None):
+        """Hand the current chunk to the WAV writer thread.
 
-        return str(chunk_file)
+        The writer emits chunk_ready once the file is on disk, so clients
+        never see a partially written chunk. Blocks only if
+        WAV_WRITE_QUEUE_SIZE chunks are already waiting.
+        """
+        taken = self._take_chunk(now)
+        if taken is None:
+            return
+        if self._writer_thread is None:
+            self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+            self._writer_thread.start()
+        self._write_queue.put((taken[0], taken[1], self.chunk_num))
 
-    def _check_perfect_silence(self, audio_chunk):
+    def _writer_loop(self):
+        """Write queued chunks in order and announce each one."""
+        while True:
+            chunk_file, audio_data, chunk_num = self._write_queue.get()
+            try:
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+                write_pcm16_wav(chunk_file, self.sample_rate, audio_data)
+                self._emit_chunk_ready(chunk_file, is_final=False, chunk_num=chunk_num)
+            except Exception as e:
+                self.tcp_server.send_event("error", error=f"Chunk write error: {e}")
+            finally:
+                self._write_queue.task_done()
+
+    def _flush_writes(self):
+        """Wait until every queued chunk is written and announced."""
+        self._write_queue.join()
+
+    def _check_perfect_silence(self, audio_chunk, now=None):
         """Check for perfect silence at startup only - verify mic is working."""
         # Only check during startup period
         if self.startup_silence_check_done:
@@ -416,11 +1347,13 @@ class ContinuousRecorder:
             self.perfect_silence_start_time = None
             return
 
+        if now is None:
+            now = self._clock()
         if self.perfect_silence_start_time is None:
-            self.perfect_silence_start_time = time.time()
+            self.perfect_silence_start_time = now
             return
 
-        silence_duration = time.time() - self.perfect_silence_start_time
+        silence_duration = now - self.perfect_silence_start_time
         # Check if perfect silence detection is enabled (> 0) and threshold exceeded
         if self.perfect_silence_duration > 0 and silence_duration >= self.perfect_silence_duration:
             # Microphone is off at startup - stop recording immediately
@@ -435,68 +1368,133 @@ class ContinuousRecorder:
             self.running = False  # Stop server loop
             self.startup_silence_check_done = True  # Don't check again
 
-    def _emit_chunk_ready(self, chunk_file, is_final=False):
-        """Emit chunk_ready event."""
+    def _emit_chunk_ready(self, chunk_file, is_final=False, chunk_num=None):
+        """Emit chunk_ready event (chunk_num defaults to the latest chunk)."""
         if chunk_file:
             if not self.tcp_server.send_event("chunk_ready",
-                                             chunk_num=self.chunk_num,
+                                             chunk_num=self.chunk_num if chunk_num is None else chunk_num,
                                              audio_file=chunk_file,
                                              is_final=is_final):
                 # Client disconnected, stop recording
                 self.running = False
 
-    def _check_max_duration(self):
+    def _check_max_duration(self, now=None):
         """Check if chunk exceeded max duration and save if needed."""
-        chunk_duration = time.time() - self.current_chunk_start_time
+        if now is None:
+            now = self._clock()
+        chunk_duration = now - self.current_chunk_start_time
         if chunk_duration >= self.max_chunk_duration:
-            chunk_file = self._save_chunk()
-            self._emit_chunk_ready(chunk_file, is_final=False)
+            self._queue_chunk(now)
             return True
         return False
 
+    def _buffer_audio(self, audio_chunk):
+        """Append audio to the current chunk, full recording and VAD window."""
+        # Convert to int16 once, then stream the converted block to disk
+        self.current_chunk_audio.append(audio_chunk)
+        chunk = self.current_chunk_audio.view()
+        # No writer once the recording is saved: a block that races the stop
+        # must not start a new file
+        writer = self._recording_writer
+        if writer is not None and not writer.write(chunk[len(chunk) - len(audio_chunk):]):
+            if not self._recording_truncated:
+                self._recording_truncated = True
+                self.tcp_server.send_event(
+                    "error", error="Complete recording reached the 2 GB WAV limit; later audio is only in chunks")
+
+        # Write into the VAD ring instead of re-concatenating recent chunks
+        ring = self._vad_ring
+        size = VAD_WINDOW_SAMPLES
+        n = len(audio_chunk)
+        if n >= size:
+            ring[:size] = ring[size:] = audio_chunk[-size:]
+            self._vad_head = 0
+        elif n > 0:
+            head = self._vad_head
+            first = min(n, size - head)
+            ring[head:head + first] = ring[head + size:head + size + first] = audio_chunk[:first]
+            if first < n:
+                ring[:n - first] = ring[size:size + n - first] = audio_chunk[first:]
+            self._vad_head = (head + n) % size
+        self._vad_window_filled = min(self._vad_window_filled + n, size)
+
     def _get_recent_audio(self):
-        """Get recent audio for VAD analysis."""
-        # Silero VAD requires exactly 512 samples for 16kHz
-        vad_samples = 512
-        recent_audio = np.concatenate(self.current_chunk_audio[-10:])
+        """Get recent audio for VAD analysis.
 
-        if len(recent_audio) >= vad_samples:
-            return recent_audio[-vad_samples:]
+        Returns a view into the VAD ring buffer (not a copy), or None until
+        the current chunk holds enough samples.
+        """
+        if self._vad_window_filled >= VAD_WINDOW_SAMPLES:
+            head = self._vad_head
+            return self._vad_ring[head:head + VAD_WINDOW_SAMPLES]
         return None
 
-    def _check_silence_boundary(self):
+    def _check_silence_boundary(self, now=None):
         """Check if silence threshold reached and save chunk if needed."""
-        chunk_duration = time.time() - self.current_chunk_start_time
-
         if self.silence_start_time is None:
             return False
 
-        silence_duration = time.time() - self.silence_start_time
+        if now is None:
+            now = self._clock()
+        chunk_duration = now - self.current_chunk_start_time
+        silence_duration = now - self.silence_start_time
         if silence_duration >= self.silence_threshold:
             if chunk_duration >= self.min_chunk_duration:
-                chunk_file = self._save_chunk()
-                self._emit_chunk_ready(chunk_file, is_final=False)
+                self._queue_chunk(now)
                 self.silence_start_time = None
                 self.consecutive_silence_count = 0
                 return True
         return False
 
-    def _process_vad(self, recent_audio):
-        """Process VAD and update silence tracking."""
-        has_voice = self._detect_voice_activity(recent_audio)
+    def _process_vad(self, recent_audio, now=None):
+        """Process VAD and update silence tracking.
 
-        if has_voice:
-            # Speech detected - reset silence tracking
-            self.silence_start_time = None
-            self.consecutive_silence_count = 0
+        With vad_batch_size > 1, windows are queued and silence tracking
+        only advances once a full batch has been run through the model.
+        """
+        if self.vad_batch_size > 1:
+            # Copy: recent_audio is the live sliding window
+            self._vad_batch.append(recent_audio.copy())
+            if len(self._vad_batch) < self.vad_batch_size:
+                return
+            decisions = self._detect_voice_activity_batch(np.stack(self._vad_batch))
+            self._vad_batch = []
         else:
-            # No speech - increment consecutive silence counter
-            self.consecutive_silence_count += 1
+            if now is None:
+                now = self._clock()
+            if self._vad_can_skip(recent_audio, now):
+                decisions = [False]
+            else:
+                self._last_vad_run = now
+                decisions = [self._detect_voice_activity(recent_audio)]
+        self._update_silence_tracking(decisions, now)
+
+    def _vad_can_skip(self, window, now):
+        """True if window is too quiet to hold speech and the model ran recently.
+
+        Quiet windows still go through the model every VAD_SKIP_MAX_SECONDS,
+        so a long quiet stretch keeps being classified by Silero.
+        """
+        threshold = self.vad_skip_amplitude
+        if threshold <= 0 or now - self._last_vad_run >= VAD_SKIP_MAX_SECONDS:
+            return False
+        return window.max() < threshold and window.min() > -threshold
 
-            # Only start silence timer after consecutive detections
-            if self.consecutive_silence_count >= VAD_CONSECUTIVE_SILENCE_REQUIRED:
-                if self.silence_start_time is None:
-                    self.silence_start_time = time.time()
+    def _update_silence_tracking(self, decisions, now=None):
+        """Advance the silence timer over a sequence of VAD decisions."""
+        for has_voice in decisions:
+            if has_voice:
+                # Speech detected - reset silence tracking
+                self.silence_start_time = None
+                self.consecutive_silence_count = 0
+            else:
+                # No speech - increment consecutive silence counter
+                self.consecutive_silence_count += 1
+
+                # Only start silence timer after consecutive detections
+                if self.consecutive_silence_count >= VAD_CONSECUTIVE_SILENCE_REQUIRED:
+                    if self.silence_start_time is None:
+                        self.silence_start_time = self._clock() if now is None else now
 
     def audio_callback(self, indata, frames, time_info, status):
         """Callback for sounddevice audio stream."""
@@ -506,43 +1504,113 @@ class ContinuousRecorder:
         # Only process audio if actively recording
         if not self.recording:
             return
+        with self._session_lock:
+            if self.recording:  # Not finalized while waiting for the lock
+                self._process_block(indata[:, 0])
+
+    def _process_block(self, audio_chunk):
+        """Buffer one mono block and run the chunk boundary checks.
+
+        Called with _session_lock held. audio_chunk may be a view of the
+        caller's buffer (sounddevice reuses indata after the callback
+        returns), but every consumer below copies what it keeps.
+        """
 
-        # Extract mono audio
-        audio_chunk = indata[:, 0].copy()
+        # Durations are measured in samples, not wall-clock time
+        self._samples_seen += len(audio_chunk)
+        now = self._clock()
 
         # Check for mic off
-        self._check_perfect_silence(audio_chunk)
+        self._check_perfect_silence(audio_chunk, now)
 
-        # Add to current chunk
-        self.current_chunk_audio.append(audio_chunk)
-        # Also accumulate for complete recording file
-        self.all_audio.append(audio_chunk)
+        # Add to current chunk and complete recording
+        self._buffer_audio(audio_chunk)
 
         # Check max duration boundary
-        if self._check_max_duration():
+        if self._check_max_duration(now):
             return
 
         # Check VAD-based silence boundary
+        if self.vad_full_block:
+            # One decision per callback (speech if any window has speech),
+            # so VAD_CONSECUTIVE_SILENCE_REQUIRED keeps counting callbacks
+            decisions = self._detect_voice_activity_windows(audio_chunk)
+            if len(decisions):
+                self._update_silence_tracking([decisions.any()], now)
+                self._check_silence_boundary(now)
+            return
         recent_audio = self._get_recent_audio()
         if recent_audio is not None:
-            self._process_vad(recent_audio)
-            self._check_silence_boundary()
+            self._process_vad(recent_audio, now)
+            self._check_silence_boundary(now)
+
+    def _enqueue_audio(self, indata, frames, time_info, status):
+        """sounddevice callback: queue the samples for the processing thread.
+
+        Runs on the real-time audio thread, so it only copies the samples;
+        VAD, silence tracking and chunking run in _process_audio_blocks.
+        """
+        if not self.recording:
+            # Don't let a partial block leak into the next recording
+            self._audio_ring.discard_partial()
+            return
+        dropped = self._audio_ring.append(indata[:, 0], status)
+        if dropped:
+            self._dropped_samples += dropped
+
+    def _process_audio_blocks(self, ring, stop):
+        """Run audio_callback on each queued microphone block, in order."""
+        reported = 0
+        while not stop.is_set():
+            block = ring.pop(timeout=0.1)
+            if block is None:
+                continue
+            samples, status = block
+            try:
+                if self._dropped_samples != reported:
+                    reported = self._dropped_samples
+                    dropped_ms = reported * 1000 // self.sample_rate
+                    self.tcp_server.send_event(
+                        "error", error=f"Audio processing fell behind: {dropped_ms} ms of audio dropped")
+                self.audio_callback(samples[:, None], len(samples), None, status)
+            except Exception as e:
+                self.tcp_server.send_event("error", error=f"Audio processing error: {e}")
+            finally:
+                ring.release()
 
     def start(self):
         """Start persistent recording server (supports multiple recording sessions)."""
         # Set up signal handlers only if in main thread
         try:
-            signal.signal(signal.SIGINT, lambda sig, frame: setattr(self, 'running', False))
-            signal.signal(signal.SIGTERM, lambda sig, frame: setattr(self, 'running', False))
+            signal.signal(signal.SIGINT, self._handle_stop_signal)
+            signal.signal(signal.SIGTERM, self._handle_stop_signal)
         except ValueError:
             # Not in main thread (e.g., during testing) - skip signal handlers
             pass
 
         # Use file source for testing or sounddevice for real recording
-        if self.audio_source:
-            self._start_with_file_source()
-        else:
-            self._start_with_microphone()
+        try:
+            if self.audio_source:
+                self._start_with_file_source()
+            else:
+                self._start_with_microphone()
+        finally:
+            self._close_unfinished_recording()
+
+    def _close_unfinished_recording(self):
+        """Keep the audio of a session cut short by shutdown, a signal or an error.
+
+        The complete recording is closed with a valid header and renamed
+        like a normal one; no events are sent, the client may be gone.
+        Returns the saved path, or None.
+        """
+        with self._session_lock:
+            self.recording = False
+            try:
+                return self._save_complete_recording()
+            except OSError as e:
+                output_debug(f"Could not save unfinished recording: {e}")
+                return None
 
     def _start_with_microphone(self):
         """Start recording from microphone using sounddevice."""
@@ -561,18 +1629,32 @@ class ContinuousRecorder:
                 if device is None:
                     raise ValueError(f"Audio input device not found: {self.audio_input_device}")
 
-            with sd.InputStream(callback=self.audio_callback,
-                              device=device,
-                              channels=1,
-                              samplerate=self.sample_rate,
-                              blocksize=int(self.sample_rate * 0.5),
-                              dtype=np.float32):
-
-                # Send server_ready event
-                self.tcp_server.send_event("server_ready")
-
-                # Main command loop - server stays running
-                self._run_command_loop()
+            block_size = int(self.sample_rate * AUDIO_BLOCK_SECONDS)
+            ring = self._audio_ring = AudioBlockRing(AUDIO_QUEUE_BLOCKS, block_size)
+            stop_worker = threading.Event()
+            self._audio_worker = threading.Thread(target=self._process_audio_blocks,
+                                                  args=(ring, stop_worker), daemon=True)
+            self._audio_worker.start()
+            try:
+                # Let PortAudio deliver its native buffer size with low
+                # latency; the ring packs those into block_size blocks
+                with sd.InputStream(callback=self._enqueue_audio,
+                                  device=device,
+                                  channels=1,
+                                  samplerate=self.sample_rate,
+                                  blocksize=0,
+                                  latency='low',
+                                  dtype=np.float32):
+
+                    # Send server_ready event
+                    self.tcp_server.send_event("server_ready")
+
+                    # Main command loop - server stays running
+                    self._run_command_loop()
+            finally:
+                stop_worker.set()
+                self._audio_worker.join()
+                self._audio_ring = self._audio_worker = None
 
         except Exception as e:
             # Microphone error - send event but stay running for retry
@@ -595,12 +1677,10 @@ class ContinuousRecorder:
                 except Exception as loop_err:
                     # Command loop error - log but keep trying
                     self.tcp_server.send_event("error", error=f"Command loop error: {loop_err}")
-                    time.sleep(1)  # Brief pause before retry
+                    self._wait_unless_stopped(1)  # Brief pause before retry
 
     def _start_with_file_source(self):
         """Start recording from file source (for testing)."""
-        import threading
-
         try:
             # Send server_ready event
             self.tcp_server.send_event("server_ready")
@@ -620,10 +1700,10 @@ class ContinuousRecorder:
                         # Call audio callback
                         self.audio_callback(chunk, len(chunk), None, None)
                         # Simulate real-time streaming delay
-                        time.sleep(self.audio_source.chunk_duration)
+                        self._wait_unless_stopped(self.audio_source.chunk_duration)
                     else:
                         # Not recording, just sleep a bit
-                        time.sleep(0.01)
+                        self._wait_unless_stopped(0.01)
 
             audio_thread = threading.Thread(target=stream_audio, daemon=True)
             audio_thread.start()
@@ -649,18 +1729,22 @@ class ContinuousRecorder:
 
     def _run_command_loop(self):
         """Main command processing loop (shared by microphone and file modes)."""
+        # Servers that support wake() are woken when running is cleared, so
+        # the loop can block until a command arrives instead of polling
+        timeout = None if hasattr(self.tcp_server, 'wake') else 0.1
         while self.running:
             # Check for commands from client
-            cmd = self.tcp_server.receive_command(timeout=0.1)
+            cmd = self.tcp_server.receive_command(timeout=timeout)
             if cmd:
                 command = cmd.get('command')
 
                 if command == 'start_recording':
                     if not self.recording:
                         # Start new recording session
-                        self._reset_recording_state()
-                        self.recording = True
-                        self.current_chunk_start_time = time.time()
+                        with self._session_lock:
+                            self._reset_recording_state()
+                            self.current_chunk_start_time = self._clock()
+                            self.recording = True
 
                         # Give stream a moment to stabilize
                         time.sleep(0.3)
@@ -686,23 +1770,48 @@ class ContinuousRecorder:
                         # No client after timeout, shutdown
                         self.running = False
 
+    def _open_complete_recording(self):
+        """Open the file the complete recording streams into.
+
+        It is written under a unique temporary name per session, so a file
+        left behind by an earlier run is never overwritten, and renamed
+        with the stop timestamp by _save_complete_recording.
+        """
+        # Ensure output directory exists
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        fd, partial = tempfile.mkstemp(
+            prefix=f"{self.filename_prefix}-recording-", suffix=".wav.part",
+            dir=self.output_dir)
+        os.close(fd)
+        return PcmWavWriter(Path(partial), self.sample_rate)
+
+    def _discard_complete_recording(self):
+        """Close and delete the complete recording of an abandoned session."""
+        writer = self._recording_writer
+        if writer is None:
+            return
+        self._recording_writer = None
+        writer.close()
+        try:
+            os.remove(writer.path)
+        except OSError:
+            pass
+
     def _save_complete_recording(self):
         """Save complete recording as single timestamped file."""
-        if not self.all_audio:
+        writer = self._recording_writer
+        if writer is None:
+            return None
+        self._recording_writer = None
+        writer.close()
+        if not writer.data_size:
+            os.remove(writer.path)
             return None
 
-        from datetime import datetime
         timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
         complete_file = self.output_dir / f"{self.filename_prefix}-{timestamp}.wav"
-
-        # Ensure output directory exists
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-
-        audio_data = np.concatenate(self.all_audio)
-        audio_data = convert_to_int16(audio_data)
-
-        import scipy.io.wavfile
-        scipy.io.wavfile.write(str(complete_file), self.sample_rate, audio_data)
+        os.replace(writer.path, complete_file)
 
         return str(complete_file)
 
@@ -711,7 +1820,26 @@ class ContinuousRecorder:
         # Reset recording state FIRST (single source of truth)
         if not self.recording:
             return  # Already finalized
-        self.recording = False
+
+        # Let the processing thread catch up on audio captured before the
+        # stop, including the callback's last partly filled block
+        ring = self._audio_ring
+        if ring is not None and threading.current_thread() is not self._audio_worker:
+            ring.flush(timeout=AUDIO_FLUSH_TIMEOUT)
+            ring.drain(timeout=AUDIO_DRAIN_TIMEOUT)
+
+        # A block still being processed finishes first; any later one sees
+        # recording cleared and is dropped, so chunk state is not shared
+        with self._session_lock:
+            if not self.recording:
+                return  # Finalized by the processing thread meanwhile
+            self.recording = False
+            self._save_final_outputs()
+
+    def _save_final_outputs(self):
+        """Emit the queued chunks, complete_file, final chunk and recording_stopped."""
+        # Earlier chunks must be announced before complete_file and the final chunk
+        self._flush_writes()
 
         # Save complete recording as single file (for auditing/re-processing)
         complete_file = self._save_complete_recording()
@@ -733,7 +1861,22 @@ class ContinuousRecorder:
 
 # === Main ===
 
+def run_check_deps():
+    """Print the dependency check result as JSON and exit."""
+    missing = check_dependencies()
+    if missing:
+        print(json.dumps({"status": "error", "missing": missing}))
+        sys.exit(1)
+    print(json.dumps({"status": "ok"}))
+    sys.exit(0)
+
+
 def main():
+    # Hammerspoon polls --check-deps at startup; answer before building the parser
+    if sys.argv[1:] == ["--check-deps"]:
+        run_check_deps()
+
+    import argparse
     parser = argparse.ArgumentParser(
         description="Continuous audio recording with Silero VAD"
     )
@@ -753,16 +1896,19 @@ def main():
     parser.add_argument("--audio-input", help="Audio input device name (e.g., 'BlackHole 2ch')")
     parser.add_argument("--perfect-silence-duration", type=float, default=0.0,
                        help="Duration of perfect silence to detect mic off (seconds, 0 = disabled, 2.0 for testing)")
+    parser.add_argument("--vad-batch-size", type=int, default=1,
+                       help="VAD windows per model call (1 = run VAD on every callback)")
+    parser.add_argument("--vad-full-block", action="store_true",
+                       help="Run VAD over every 512-sample window of each callback, not just the last one")
+    parser.add_argument("--vad-hop", type=int, default=VAD_WINDOW_SAMPLES,
+                       help="Samples between VAD windows with --vad-full-block (1024 halves model calls)")
+    parser.add_argument("--vad-skip-amplitude", type=float, default=VAD_SKIP_AMPLITUDE,
+                       help="Peak amplitude below which a window counts as silence without running VAD (0 = always run VAD)")
 
     args = parser.parse_args()
 
     if args.check_deps:
-        missing = check_dependencies()
-        if missing:
-            print(json.dumps({"status": "error", "missing": missing}))
-            sys.exit(1)
-        print(json.dumps({"status": "ok"}))
-        sys.exit(0)
+        run_check_deps()
 
     if not args.output_dir or not args.filename_prefix:
         print(json.dumps({"status": "error", "error": "Missing required arguments"}),
@@ -807,7 +1953,11 @@ def main():
             args.max_chunk_duration,
             audio_source=audio_source,
             audio_input_device=args.audio_input,
-            perfect_silence_duration=args.perfect_silence_duration
+            perfect_silence_duration=args.perfect_silence_duration,
+            vad_batch_size=args.vad_batch_size,
+            vad_full_block=args.vad_full_block,
+            vad_hop=args.vad_hop,
+            vad_skip_amplitude=args.vad_skip_amplitude
         )
         recorder.start()
     except Exception as e:
@@ -1,18 +1,115 @@
 """
 Pytest configuration and shared fixtures for whisper_stream tests.
 """
-import pytest
+import copy
+import functools
+import os
 import sys
 from pathlib import Path
 
+import numpy as np
+import pytest
+
 # Add recorders/streaming directory to path so tests can import whisper_stream
 spoon_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(spoon_root / "recorders" / "streaming"))
 
+from whisper_stream import ContinuousRecorder, FileAudioSource
+
+from .mock_microphone import MockSD
+
+
+@pytest.fixture
+def mock_sounddevice_failure(monkeypatch):
+    """Replace sounddevice with a mock whose input stream always fails."""
+    monkeypatch.setitem(sys.modules, 'sounddevice', MockSD())
+
+
+CHUNKS_DIR = spoon_root / "tests" / "fixtures" / "audio" / "chunks"
+
+
+@functools.cache
+def _chunk_exists(name):
+    return (CHUNKS_DIR / name).exists()
+
+
+@pytest.fixture(scope="session")
+def chunk_wav():
+    """Resolve a WAV under tests/fixtures/audio/chunks, skipping the test if missing.
+
+    Each file is checked on disk once per session.
+    """
+    def _resolve(name):
+        if not _chunk_exists(name):
+            pytest.skip("Test audio file not found")
+        return CHUNKS_DIR / name
+    return _resolve
+
+
+@pytest.fixture(scope="session")
+def chunk_short_path(chunk_wav):
+    """Path to chunk_short.wav (skips dependent tests if missing)."""
+    return chunk_wav("chunk_short.wav")
+
+
+@pytest.fixture(scope="session")
+def tcp_port_base():
+    """Base TCP port for this test worker, 10 ports apart per xdist worker."""
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+    index = int(worker[2:]) if worker.startswith("gw") else 0
+    return 12000 + index * 10
+
+
+@pytest.fixture(scope="session")
+def silero_vad():
+    """Silero VAD model loaded once and shared by every recorder in the session."""
+    return ContinuousRecorder._load_vad_model()
+
+
+class FastSilenceVAD:
+    """VAD wrapper that answers "no speech" for all-zero input.
+
+    Only non-silent windows reach the wrapped model.
+    """
+
+    def __init__(self, model):
+        self._model = model
+
+    def __call__(self, audio, sample_rate):
+        if not audio.any():
+            # Same shape as Silero's output: one probability per window
+            return np.zeros(tuple(audio.shape[:-1]) + (1,), dtype=np.float32)
+        return self._model(audio, sample_rate)
+
+    def reset_states(self):
+        self._model.reset_states()
+
+
+@pytest.fixture(scope="session")
+def silence_vad(silero_vad):
+    """Shared Silero model that skips inference on digital silence."""
+    return FastSilenceVAD(silero_vad)
+
+
+@pytest.fixture(scope="session")
+def _decoded_audio_sources():
+    """FileAudioSource objects keyed by path, each file decoded once."""
+    return {}
+
+
+@pytest.fixture
+def file_source(_decoded_audio_sources):
+    """Factory for FileAudioSource objects that share decoded audio.
 
-@pytest.fixture(autouse=True)
-def reset_modules():
-    """Reset module state between tests."""
-    # Clean up any module-level state if needed
-    yield
-    # Cleanup after test
+    Each call returns a fresh source positioned at the start, backed by the
+    same audio_data array as every other source for that file.
+    """
+    def _make(file_path):
+        key = str(file_path)
+        loaded = _decoded_audio_sources.get(key)
+        if loaded is None:
+            loaded = _decoded_audio_sources[key] = FileAudioSource(file_path)
+        source = copy.copy(loaded)
+        source.position = 0
+        return source
+    return _make
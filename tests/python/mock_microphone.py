@@ -0,0 +1,93 @@
+"""
+Run whisper_stream.main() in a child process with a failing microphone.
+
+Children come from a forkserver, so each test forks an already-started
+interpreter instead of cold-starting `python3 -c` and re-importing
+everything.
+"""
+import multiprocessing
+import socket
+import sys
+import threading
+import time
+
+
+# Missing modules are skipped by the forkserver
+_PRELOAD_MODULES = ['whisper_stream', 'numpy', 'torch']
+
+
+class MockSD:
+    """Stand-in for sounddevice whose input stream always fails."""
+
+    class InputStream:
+        def __init__(self, *args, **kwargs):
+            raise RuntimeError("No default input device found")
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+
+def _tcp_client(port, hold):
+    """Connect to the server and echo received events to stderr."""
+    time.sleep(0.5)
+    try:
+        sock = socket.create_connection(('127.0.0.1', port))
+        sock.settimeout(0.1)
+        deadline = time.monotonic() + hold
+        while time.monotonic() < deadline:
+            try:
+                data = sock.recv(4096)
+            except socket.timeout:
+                continue
+            if not data:
+                break
+            sys.stderr.write(data.decode('utf-8'))
+        sock.close()
+    except OSError:
+        pass
+
+
+def _run_main(argv, stderr_path, client_port):
+    """Process target: mock sounddevice, then run main() with argv."""
+    sys.modules['sounddevice'] = MockSD()
+    sys.stderr = open(stderr_path, 'w', buffering=1)
+
+    if client_port is not None:
+        threading.Thread(target=_tcp_client, args=(client_port, 2), daemon=True).start()
+
+    from whisper_stream import main
+    sys.argv = ['whisper_stream.py', *argv]
+    main()
+
+
+def start_main_without_microphone(argv, stderr_path, client_port=None):
+    """Start main() in a child process; returns the started Process.
+
+    If client_port is given, the child also connects a TCP client that
+    copies every event it receives into the stderr file.
+    """
+    ctx = multiprocessing.get_context('forkserver')
+    # Imported once in the server, so each forked child starts with them loaded
+    ctx.set_forkserver_preload(_PRELOAD_MODULES)
+    process = ctx.Process(target=_run_main,
+                          args=(list(argv), str(stderr_path), client_port),
+                          daemon=True)
+    process.start()
+    return process
+
+
+def stop(process):
+    """Terminate the child if it is still running and reap it.
+
+    A server waiting for a client to reconnect doesn't act on SIGTERM
+    until that wait ends, so it is killed if it doesn't exit promptly.
+    """
+    if process.is_alive():
+        process.terminate()
+        process.join(timeout=2)
+        if process.is_alive():
+            process.kill()
+    process.join()
@@ -0,0 +1,53 @@
+"""
+In-memory stand-in for whisper_stream.TCPServer used by recorder tests.
+"""
+import collections
+import threading
+
+
+class MockTCPServer:
+    """Mock TCP server that captures events for testing."""
+
+    def __init__(self):
+        self.events = []
+        # Single producer/consumer: deque append/popleft are atomic, so
+        # the event is only used to wake the recorder up
+        self.commands = collections.deque()
+        self._command_ready = threading.Event()
+        self._cond = threading.Condition()
+
+    def send_event(self, event_type, **kwargs):
+        """Capture events instead of sending over network."""
+        with self._cond:
+            self.events.append({"type": event_type, **kwargs})
+            self._cond.notify_all()
+        return True
+
+    def receive_command(self, timeout=0.1):
+        """Return queued commands, waking up as soon as one is posted."""
+        if not self.commands and self._command_ready.wait(timeout):
+            self._command_ready.clear()
+        try:
+            return self.commands.popleft()
+        except IndexError:
+            return None
+
+    def wake(self):
+        """End a receive_command() wait, like TCPServer.wake()."""
+        self._command_ready.set()
+
+    def post_command(self, command):
+        """Queue a command for the recorder."""
+        self.commands.append({"command": command})
+        self._command_ready.set()
+
+    def wait_for_event(self, event_type, timeout=5.0):
+        """Block until an event of the given type has been sent."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: any(e["type"] == event_type for e in self.events),
+                timeout)
+
+    def wait_for_reconnect(self, timeout=60):
+        """Mock reconnect wait."""
+        return False
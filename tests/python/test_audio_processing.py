@@ -1,18 +1,21 @@
 """
 Unit tests for audio processing functions in whisper_stream.py
 """
+import time
 import pytest
 import numpy as np
-import sys
-from pathlib import Path
-
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from whisper_stream import (
     normalize_audio,
     is_perfect_silence,
+    _scan_silence,
+    _warm_up_silence_kernel,
     convert_to_int16,
+    AudioBuffer,
+    AudioBlockRing,
+    write_pcm16_wav,
+    PcmWavWriter,
+    INT16_CONVERT_TILE_SAMPLES,
     SILENCE_AMPLITUDE_THRESHOLD
 )
 
@@ -40,6 +43,24 @@ class TestNormalizeAudio:
         assert result.dtype == np.float32
         assert np.allclose(result, audio)
 
+    def test_float32_not_copied(self):
+        """Float32 input should be returned without a copy."""
+        audio = np.zeros(512, dtype=np.float32)
+        assert normalize_audio(audio) is audio
+
+    def test_contiguous_view_not_copied(self):
+        """A C-contiguous view should not be copied."""
+        audio = np.zeros(512, dtype=np.float32)
+        assert np.shares_memory(normalize_audio(audio[::1]), audio)
+
+    def test_strided_view_made_contiguous(self):
+        """Strided input should come back contiguous with the same values."""
+        audio = np.arange(10, dtype=np.int16)[::2]
+        result = normalize_audio(audio)
+
+        assert result.flags.c_contiguous
+        assert np.allclose(result * 32768, [0, 2, 4, 6, 8])
+
     def test_float64_to_float32(self):
         """Should convert float64 to float32."""
         audio = np.array([0.0, 0.5, -0.5], dtype=np.float64)
@@ -91,6 +112,53 @@ class TestIsPerfectSilence:
         audio[500] = 0.1  # One loud sample
         assert not is_perfect_silence(audio)
 
+    def test_loud_sample_in_later_tile(self):
+        """Loud sample past the first scan tile should still be found."""
+        audio = np.zeros(16000, dtype=np.float32)
+        audio[-1] = -0.5
+        assert not is_perfect_silence(audio)
+
+    def test_long_silent_buffer(self):
+        """Silent buffer spanning several scan tiles is silence."""
+        audio = np.full(16000, SILENCE_AMPLITUDE_THRESHOLD * 0.5, dtype=np.float32)
+        assert is_perfect_silence(audio)
+
+    def test_int16_min_value_not_silence(self):
+        """Most negative int16 sample must not wrap around to silence."""
+        audio = np.full(1000, -32768, dtype=np.int16)
+        assert not is_perfect_silence(audio)
+
+    def test_int16_threshold_boundary(self):
+        """Int16 threshold should match the normalized float threshold."""
+        assert is_perfect_silence(np.full(10, 327, dtype=np.int16))
+        assert not is_perfect_silence(np.full(10, 328, dtype=np.int16))
+
+    def test_negative_int16_threshold_boundary(self):
+        """Negative int16 peaks should use the same threshold as positive ones."""
+        assert is_perfect_silence(np.full(10, -327, dtype=np.int16))
+        assert not is_perfect_silence(np.full(10, -328, dtype=np.int16))
+
+    def test_float64_input(self):
+        """Float64 input should be checked without conversion."""
+        assert is_perfect_silence(np.zeros(10000))
+        assert not is_perfect_silence(np.full(100, 0.5))
+
+    def test_warm_up_compiles_both_dtypes(self, monkeypatch):
+        """Warm-up should run the kernel once per supported dtype."""
+        calls = []
+        monkeypatch.setattr("whisper_stream._silence_kernel",
+                            lambda buf, threshold: calls.append(buf.dtype))
+        _warm_up_silence_kernel()
+        assert calls == [np.float32, np.int16]
+
+    def test_scan_kernel_matches(self):
+        """Loop body used for the Numba kernel should agree with the scan."""
+        audio = np.zeros(100, dtype=np.float32)
+        assert _scan_silence(audio, SILENCE_AMPLITUDE_THRESHOLD)
+        audio[50] = -0.5
+        assert not _scan_silence(audio, SILENCE_AMPLITUDE_THRESHOLD)
+        assert not _scan_silence(np.full(4, -32768, dtype=np.int16), 327.68)
+
 
 class TestConvertToInt16:
     """Test audio conversion to int16 format."""
@@ -114,6 +182,20 @@ class TestConvertToInt16:
 
         assert result.dtype == np.int16
 
+    def test_strided_float_input(self):
+        """Strided float input should convert like its contiguous copy."""
+        audio = np.linspace(-1, 1, 20, dtype=np.float32)[::3]
+        result = convert_to_int16(audio)
+
+        assert result.flags.c_contiguous
+        assert np.array_equal(result, convert_to_int16(audio.copy()))
+
+    def test_multi_tile_input(self):
+        """Input spanning several conversion tiles should convert every sample."""
+        audio = np.linspace(-1.5, 1.5, 2 * INT16_CONVERT_TILE_SAMPLES + 7, dtype=np.float32)
+        expected = np.clip(audio * np.float32(32767), -32767, 32767).astype(np.int16)
+        assert np.array_equal(convert_to_int16(audio), expected)
+
     def test_int16_passthrough(self):
         """Should pass through int16 unchanged."""
         audio = np.array([0, 1000, -1000, 32767, -32768], dtype=np.int16)
@@ -129,6 +211,7 @@ class TestConvertToInt16:
 
         assert result.dtype == np.int16
         # Values should be clipped to int16 range
+        assert result.tolist() == [-32767, -32767, 32767, 32767]
 
     def test_empty_array(self):
         """Should handle empty array."""
@@ -137,3 +220,184 @@ class TestConvertToInt16:
 
         assert result.dtype == np.int16
         assert len(result) == 0
+
+
+class TestAudioBuffer:
+    """Test the growable contiguous sample buffer."""
+
+    def test_append_and_grow(self):
+        """Appends past the initial capacity should keep every sample in order."""
+        buf = AudioBuffer(4)
+        pieces = [np.arange(3, dtype=np.float32), np.arange(3, 10, dtype=np.float32),
+                  np.array([10], dtype=np.float32)]
+        for piece in pieces:
+            buf.append(piece)
+
+        assert len(buf) == 11
+        assert buf.view().dtype == np.float32
+        assert buf.view().tolist() == list(range(11))
+
+    def test_clear_reuses_storage(self):
+        """clear() should empty the buffer without reallocating."""
+        buf = AudioBuffer(8)
+        buf.append(np.ones(5, dtype=np.float32))
+        before = buf.view()
+        buf.clear()
+
+        assert len(buf) == 0
+        assert not buf
+        buf.append(np.zeros(2, dtype=np.float32))
+        assert np.shares_memory(buf.view(), before)
+
+    def test_int16_buffer_converts_on_append(self):
+        """An int16 buffer should store what convert_to_int16 would produce."""
+        rng = np.random.default_rng(0)
+        buf = AudioBuffer(1000, dtype=np.int16)
+        pieces = [rng.uniform(-1.5, 1.5, n).astype(np.float32) for n in (700, 900)]
+        for piece in pieces:
+            buf.append(piece)
+
+        assert buf.view().dtype == np.int16
+        assert np.array_equal(buf.view(), convert_to_int16(np.concatenate(pieces)))
+
+
+class TestAudioBlockRing:
+    """Test the SPSC ring between the audio callback and the processing thread."""
+
+    def test_blocks_come_out_in_order(self):
+        """Blocks should be popped in append order with their status."""
+        ring = AudioBlockRing(4, 8)
+        ring.append(np.full(8, 1, dtype=np.float32))
+        ring.append(np.full(8, 2, dtype=np.float32), status="overflow")
+
+        samples, status = ring.pop(timeout=0)
+        assert samples.tolist() == [1] * 8 and status is None
+        ring.release()
+        samples, status = ring.pop(timeout=0)
+        assert samples.tolist() == [2] * 8 and status == "overflow"
+        ring.release()
+        assert ring.pop(timeout=0) is None
+
+    def test_full_ring_drops_instead_of_blocking(self):
+        """append() should drop samples when the consumer is a ring behind."""
+        ring = AudioBlockRing(2, 4)
+        block = np.zeros(4, dtype=np.float32)
+        assert ring.append(block) == 0 and ring.append(block) == 0
+        assert ring.append(np.zeros(6, dtype=np.float32)) == 6
+
+        ring.pop(timeout=0)
+        ring.release()
+        assert ring.append(np.zeros(6, dtype=np.float32)) == 2
+
+    def test_append_packs_full_blocks(self):
+        """append() should hand over block_size blocks whatever the input sizes."""
+        ring = AudioBlockRing(4, 8)
+        samples = np.arange(20, dtype=np.float32)
+        ring.append(samples[:3])
+        ring.append(samples[3:13], status="overflow")
+        ring.append(samples[13:20])
+
+        block, status = ring.pop(timeout=0)
+        assert block.tolist() == list(range(8)) and status == "overflow"
+        ring.release()
+        block, status = ring.pop(timeout=0)
+        assert block.tolist() == list(range(8, 16)) and status is None
+        ring.release()
+        assert ring.pop(timeout=0) is None
+
+        ring.discard_partial()
+        ring.append(samples[:8])
+        assert ring.pop(timeout=0)[0].tolist() == list(range(8))
+
+    def test_flush_hands_over_partial_slot(self):
+        """flush() should publish the partial slot on the producer's next append."""
+        import threading
+        ring = AudioBlockRing(4, 8)
+        ring.append(np.arange(11, dtype=np.float32))
+        assert not ring.flush(timeout=0)  # No append yet
+
+        flushed = []
+        waiter = threading.Thread(target=lambda: flushed.append(ring.flush(timeout=2.0)))
+        waiter.start()
+        while not ring._flush_requested.is_set():
+            time.sleep(0.001)
+        ring.append(np.array([11], dtype=np.float32))
+        waiter.join()
+        assert flushed == [True]
+
+        assert ring.pop(timeout=0)[0].tolist() == list(range(8))
+        ring.release()
+        assert ring.pop(timeout=0)[0].tolist() == [8, 9, 10, 11]
+        ring.release()
+        assert ring.pop(timeout=0) is None
+
+    def test_drain_waits_for_release(self):
+        """drain() should return once every handed-over block is released."""
+        import threading
+        ring = AudioBlockRing(4, 4)
+        ring.append(np.zeros(4, dtype=np.float32))
+        assert not ring.drain(timeout=0)
+
+        def consume():
+            ring.pop()
+            ring.release()
+        threading.Thread(target=consume).start()
+        assert ring.drain(timeout=2.0)
+
+
+class TestWritePcm16Wav:
+    """Test the raw PCM16 WAV writer."""
+
+    def test_roundtrip_with_scipy(self, tmp_path):
+        """scipy should read back the same rate and samples."""
+        import scipy.io.wavfile
+        samples = np.array([0, 1, -1, 32767, -32768, 1234], dtype=np.int16)
+        path = tmp_path / "out.wav"
+        write_pcm16_wav(path, 16000, samples)
+
+        rate, data = scipy.io.wavfile.read(str(path))
+        assert rate == 16000
+        assert data.dtype == np.int16
+        assert np.array_equal(data, samples)
+        assert path.stat().st_size == 44 + samples.nbytes
+
+    def test_empty(self, tmp_path):
+        """No samples should still give a valid header-only file."""
+        import scipy.io.wavfile
+        path = tmp_path / "empty.wav"
+        write_pcm16_wav(path, 16000, np.array([], dtype=np.int16))
+
+        rate, data = scipy.io.wavfile.read(str(path))
+        assert rate == 16000
+        assert len(data) == 0
+
+    def test_streaming_writer(self, tmp_path):
+        """Blocks written incrementally should read back as one file."""
+        import scipy.io.wavfile
+        samples = np.arange(-3000, 3000, dtype=np.int16)
+        path = tmp_path / "stream.wav"
+        writer = PcmWavWriter(path, 16000)
+        for block in np.array_split(samples, 4):
+            writer.write(block)
+        writer.close()
+
+        rate, data = scipy.io.wavfile.read(str(path))
+        assert rate == 16000
+        assert np.array_equal(data, samples)
+        ref = tmp_path / "ref.wav"
+        write_pcm16_wav(ref, 16000, samples)
+        assert path.read_bytes() == ref.read_bytes()
+
+    def test_streaming_writer_size_limit(self, tmp_path):
+        """Samples past max_data_bytes should be dropped, leaving a valid file."""
+        import scipy.io.wavfile
+        samples = np.arange(100, dtype=np.int16)
+        path = tmp_path / "limit.wav"
+        writer = PcmWavWriter(path, 16000, max_data_bytes=121)
+        assert writer.write(samples[:50])
+        assert not writer.write(samples[50:])
+        assert not writer.write(samples[:10])
+        writer.close()
+
+        rate, data = scipy.io.wavfile.read(str(path))
+        assert np.array_equal(data, samples[:60])
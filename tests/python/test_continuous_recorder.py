@@ -1,49 +1,69 @@
 """
 Unit tests for ContinuousRecorder in whisper_stream.py
 """
+import ctypes
 import pytest
 import numpy as np
-import sys
-from pathlib import Path
+import scipy.io.wavfile
+from types import SimpleNamespace
 from unittest.mock import Mock, patch, MagicMock
-import tempfile
-import shutil
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from whisper_stream import ContinuousRecorder, OnnxSileroVAD, convert_to_int16, normalize_audio
 
-from whisper_stream import ContinuousRecorder, normalize_audio
+
+class _FakeVADResult:
+    """Stand-in for the tensor returned by the VAD model."""
+    __slots__ = ('p',)
+
+    def __init__(self, p):
+        self.p = p
+
+    def item(self):
+        return self.p
+
+
+class _FakeVAD:
+    """Cheap VAD model stub returning a fixed speech probability."""
+
+    def __init__(self):
+        self.p = 0.8
+
+    def __call__(self, *args, **kwargs):
+        return _FakeVADResult(self.p)
+
+    def eval(self):
+        pass
+
+
+@pytest.fixture(scope="module")
+def rand_audio():
+    """Deterministic float32 noise shared by tests as slices."""
+    return np.random.default_rng(0).standard_normal(8192).astype(np.float32)
 
 
 class TestContinuousRecorder:
     """Test ContinuousRecorder class."""
 
-    @pytest.fixture
-    def temp_dir(self):
-        """Create temporary directory for test outputs."""
-        tmpdir = tempfile.mkdtemp()
-        yield Path(tmpdir)
-        shutil.rmtree(tmpdir)
+    @pytest.fixture(scope="module")
+    def temp_dir(self, tmp_path_factory):
+        """Create temporary directory for test outputs (cleaned up by pytest)."""
+        return tmp_path_factory.mktemp("recorder")
 
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def mock_tcp_server(self):
         """Create mock TCP server."""
         server = Mock()
         server.send_event = Mock(return_value=True)
         return server
 
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def mock_vad_model(self):
-        """Create mock VAD model."""
-        model = Mock()
-        # Return high speech probability by default
-        model.return_value = Mock(item=Mock(return_value=0.8))
-        model.eval = Mock()
-        return model
+        """Create fake VAD model (high speech probability by default)."""
+        return _FakeVAD()
 
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def recorder(self, mock_tcp_server, temp_dir, mock_vad_model):
-        """Create recorder with mocked dependencies."""
+        """Create recorder with mocked dependencies (shared by the module)."""
         with patch('whisper_stream.ContinuousRecorder._load_vad_model',
                   return_value=mock_vad_model):
             rec = ContinuousRecorder(
@@ -58,6 +78,18 @@ class TestContinuousRecorder:
             )
             return rec
 
+    @pytest.fixture(autouse=True)
+    def reset_recorder(self, recorder, mock_tcp_server, mock_vad_model):
+        """Put the shared recorder and mocks back in their initial state."""
+        recorder._reset_recording_state()
+        recorder.running = True
+        recorder.recording = False
+
+        mock_tcp_server.send_event.reset_mock()
+        mock_tcp_server.send_event.return_value = True
+
+        mock_vad_model.p = 0.8
+
     def test_initialization(self, recorder, temp_dir):
         """Should initialize with correct configuration."""
         assert recorder.output_dir == temp_dir
@@ -70,23 +102,53 @@ class TestContinuousRecorder:
         assert recorder.running is True
         assert recorder.recording is False
 
+    def test_chunk_buffer_holds_max_chunk(self, recorder, rand_audio):
+        """A max-length chunk should fit without reallocating the chunk buffer."""
+        block = np.resize(rand_audio, 8000)  # One 0.5 s callback
+        recorder.current_chunk_audio.append(block)
+        storage = recorder.current_chunk_audio.view()
+        for _ in range(int(recorder.max_chunk_duration * 2)):
+            recorder.current_chunk_audio.append(block)
+
+        assert np.shares_memory(recorder.current_chunk_audio.view(), storage)
+
     def test_reset_recording_state(self, recorder):
         """Should reset all recording state."""
         # Set some state
         recorder.chunk_num = 5
-        recorder.current_chunk_audio = [np.array([1, 2, 3])]
-        recorder.all_audio = [np.array([1, 2, 3])]
+        recorder._buffer_audio(np.array([0.1, 0.2, 0.3], dtype=np.float32))
         recorder.mic_off = True
 
         # Reset
         recorder._reset_recording_state()
 
         assert recorder.chunk_num == 0
-        assert recorder.current_chunk_audio == []
-        assert recorder.all_audio == []
+        assert len(recorder.current_chunk_audio) == 0
+        assert recorder._recording_writer.data_size == 0
         assert recorder.mic_off is False
         assert recorder.silence_start_time is None
 
+    def test_reset_recording_state_resets_vad(self, recorder):
+        """A new session should clear the VAD model's recurrent state."""
+        model = Mock()
+        with patch.object(recorder, 'vad_model', model):
+            recorder._reset_recording_state()
+        model.reset_states.assert_called_once_with()
+
+    def test_stop_signal_wakes_waiters(self, recorder):
+        """A stop signal should clear running and end pending waits at once."""
+        import signal
+        import threading
+
+        woke = []
+        waiter = threading.Thread(target=lambda: woke.append(recorder._wait_unless_stopped(30)))
+        waiter.start()
+        recorder._handle_stop_signal(signal.SIGTERM, None)
+        waiter.join(timeout=2.0)
+
+        assert recorder.running is False
+        assert woke == [True]
+
     def test_check_perfect_silence_all_zeros(self, recorder):
         """Should detect perfect silence."""
         silence_audio = np.zeros(8000, dtype=np.float32)
@@ -97,15 +159,15 @@ class TestContinuousRecorder:
         assert not recorder.mic_off
 
         # Simulate time passing
-        with patch('time.time', return_value=recorder.perfect_silence_start_time + 3.0):
-            recorder._check_perfect_silence(silence_audio)
+        recorder._check_perfect_silence(silence_audio,
+                                        now=recorder.perfect_silence_start_time + 3.0)
 
         assert recorder.mic_off is True
         assert recorder.running is False
 
-    def test_check_perfect_silence_normal_audio(self, recorder):
+    def test_check_perfect_silence_normal_audio(self, recorder, rand_audio):
         """Should not detect silence for normal audio."""
-        normal_audio = np.random.randn(8000).astype(np.float32) * 0.1
+        normal_audio = rand_audio[:8000] * 0.1
 
         recorder._check_perfect_silence(normal_audio)
 
@@ -113,47 +175,44 @@ class TestContinuousRecorder:
         assert recorder.perfect_silence_start_time is None
         assert not recorder.mic_off
 
-    def test_save_chunk_creates_file(self, recorder, temp_dir):
+    def test_save_chunk_creates_file(self, recorder, rand_audio, temp_dir):
         """Should save audio chunk to WAV file."""
         # Add audio data
-        recorder.current_chunk_audio = [
-            np.random.randn(8000).astype(np.float32)
-        ]
+        recorder.current_chunk_audio.append(rand_audio[:8000])
 
-        with patch('scipy.io.wavfile.write') as mock_write:
+        with patch('whisper_stream.write_pcm16_wav') as mock_write:
             chunk_file = recorder._save_chunk()
 
-        assert chunk_file is not None
-        assert "test_chunk_001.wav" in chunk_file
+        assert chunk_file == str(temp_dir / "test_chunk_001.wav")
         assert recorder.chunk_num == 1
-        assert recorder.current_chunk_audio == []  # Should be reset
+        assert len(recorder.current_chunk_audio) == 0  # Should be reset
         mock_write.assert_called_once()
+        assert np.array_equal(mock_write.call_args[0][2],
+                              convert_to_int16(rand_audio[:8000]))
 
     def test_save_chunk_empty_audio(self, recorder):
         """Should handle empty audio gracefully."""
-        recorder.current_chunk_audio = []
-
         chunk_file = recorder._save_chunk()
 
         assert chunk_file is None
         assert recorder.chunk_num == 0  # Should not increment
 
-    def test_save_chunk_increments_counter(self, recorder):
+    def test_save_chunk_increments_counter(self, recorder, rand_audio):
         """Should increment chunk counter on each save."""
-        recorder.current_chunk_audio = [np.random.randn(8000).astype(np.float32)]
+        recorder.current_chunk_audio.append(rand_audio[:8000])
 
-        with patch('scipy.io.wavfile.write'):
+        with patch('whisper_stream.write_pcm16_wav'):
             recorder._save_chunk()
             assert recorder.chunk_num == 1
 
-            recorder.current_chunk_audio = [np.random.randn(8000).astype(np.float32)]
+            recorder.current_chunk_audio.append(rand_audio[:8000])
             recorder._save_chunk()
             assert recorder.chunk_num == 2
 
-    def test_detect_voice_activity_speech(self, recorder, mock_vad_model):
+    def test_detect_voice_activity_speech(self, recorder, rand_audio, mock_vad_model):
         """Should detect speech in audio."""
-        audio = np.random.randn(512).astype(np.float32)
-        mock_vad_model.return_value.item.return_value = 0.9  # High speech probability
+        audio = rand_audio[:512]
+        mock_vad_model.p = 0.9  # High speech probability
 
         has_voice = recorder._detect_voice_activity(audio)
 
@@ -162,42 +221,59 @@ class TestContinuousRecorder:
     def test_detect_voice_activity_silence(self, recorder, mock_vad_model):
         """Should detect silence in audio."""
         audio = np.zeros(512, dtype=np.float32)
-        mock_vad_model.return_value.item.return_value = 0.1  # Low speech probability
+        mock_vad_model.p = 0.1  # Low speech probability
 
         has_voice = recorder._detect_voice_activity(audio)
 
         assert has_voice is False
 
-    def test_detect_voice_activity_error_handling(self, recorder, mock_vad_model, mock_tcp_server):
+    def test_detect_voice_activity_error_handling(self, recorder, rand_audio, mock_tcp_server):
         """Should handle VAD errors gracefully."""
-        audio = np.random.randn(512).astype(np.float32)
-        mock_vad_model.side_effect = Exception("VAD error")
+        audio = rand_audio[:512]
+        failing_model = Mock(side_effect=Exception("VAD error"))
 
-        has_voice = recorder._detect_voice_activity(audio)
+        with patch.object(recorder, 'vad_model', failing_model):
+            has_voice = recorder._detect_voice_activity(audio)
 
         # Should assume speech on error (safer to keep audio)
         assert has_voice is True
         mock_tcp_server.send_event.assert_called()
 
-    def test_check_max_duration(self, recorder):
+    def test_check_max_duration(self, recorder, rand_audio, mock_tcp_server):
         """Should save chunk when max duration exceeded."""
-        recorder.current_chunk_audio = [np.random.randn(8000).astype(np.float32)]
+        recorder.current_chunk_audio.append(rand_audio[:8000])
         recorder.current_chunk_start_time = 0.0  # Long time ago
 
-        with patch('time.time', return_value=15.0):  # 15 seconds elapsed
-            with patch('scipy.io.wavfile.write'):
-                result = recorder._check_max_duration()
+        with patch('whisper_stream.write_pcm16_wav') as mock_write:
+            result = recorder._check_max_duration(now=15.0)  # 15 seconds elapsed
+            recorder._flush_writes()
 
         assert result is True
         assert recorder.chunk_num == 1
-
-    def test_check_max_duration_not_exceeded(self, recorder):
+        # Written and announced by the writer thread
+        mock_write.assert_called_once()
+        mock_tcp_server.send_event.assert_called_once_with(
+            "chunk_ready", chunk_num=1, audio_file=str(mock_write.call_args[0][0]), is_final=False)
+
+    def test_queued_chunks_flushed_before_final(self, recorder, rand_audio, mock_tcp_server):
+        """Queued chunk_ready events should precede complete_file and the final chunk."""
+        recorder.recording = True
+        with patch('whisper_stream.write_pcm16_wav'):
+            recorder._buffer_audio(rand_audio[:8000])
+            recorder._queue_chunk()
+            recorder._buffer_audio(rand_audio[:8000])
+            recorder._finalize_recording()
+
+        events = [(c[0][0], c[1].get('chunk_num')) for c in mock_tcp_server.send_event.call_args_list]
+        assert events == [("chunk_ready", 1), ("complete_file", None),
+                          ("chunk_ready", 2), ("recording_stopped", None)]
+
+    def test_check_max_duration_not_exceeded(self, recorder, rand_audio):
         """Should not save chunk when under max duration."""
-        recorder.current_chunk_audio = [np.random.randn(8000).astype(np.float32)]
+        recorder.current_chunk_audio.append(rand_audio[:8000])
         recorder.current_chunk_start_time = 0.0
 
-        with patch('time.time', return_value=5.0):  # 5 seconds (under 10s max)
-            result = recorder._check_max_duration()
+        result = recorder._check_max_duration(now=5.0)  # 5 seconds (under 10s max)
 
         assert result is False
         assert recorder.chunk_num == 0  # No save
@@ -221,32 +297,95 @@ class TestContinuousRecorder:
 
         assert recorder.running is False
 
-    def test_get_recent_audio_sufficient_samples(self, recorder):
+    def test_get_recent_audio_sufficient_samples(self, recorder, rand_audio):
         """Should return recent 512 samples for VAD."""
         # Add enough audio
         for _ in range(5):
-            recorder.current_chunk_audio.append(np.random.randn(200).astype(np.float32))
+            recorder._buffer_audio(rand_audio[:200])
 
         recent = recorder._get_recent_audio()
 
         assert recent is not None
         assert len(recent) == 512
+        # Window holds the tail of the buffered audio, in order
+        assert np.array_equal(recent[-200:], rand_audio[:200])
+        assert np.array_equal(recent[:112], rand_audio[88:200])
+
+    def test_get_recent_audio_wraps_ring(self, recorder, rand_audio):
+        """Window should match the tail of the buffered audio across wrap-arounds."""
+        buffered = [rand_audio[:512]]
+        recorder._buffer_audio(buffered[0])
+        for size in (300, 177, 512, 45, 1000, 333, 260):
+            piece = rand_audio[:size]
+            recorder._buffer_audio(piece)
+            buffered.append(piece)
+
+            recent = recorder._get_recent_audio()
+            assert recent.flags.c_contiguous
+            assert np.array_equal(recent, np.concatenate(buffered)[-512:])
+
+    def test_get_recent_audio_reset_after_save(self, recorder, rand_audio):
+        """Should not reuse samples from the previous chunk for VAD."""
+        recorder._buffer_audio(rand_audio[:8000])
+
+        with patch('whisper_stream.write_pcm16_wav'):
+            recorder._save_chunk()
+
+        assert recorder._get_recent_audio() is None
 
-    def test_get_recent_audio_insufficient_samples(self, recorder):
+    def test_get_recent_audio_insufficient_samples(self, recorder, rand_audio):
         """Should return None when not enough samples."""
-        recorder.current_chunk_audio = [np.random.randn(100).astype(np.float32)]
+        recorder._buffer_audio(rand_audio[:100])
 
         recent = recorder._get_recent_audio()
 
         assert recent is None
 
-    def test_process_vad_speech_detected(self, recorder):
+    def test_detect_voice_activity_reuses_tensor(self, recorder, rand_audio, mock_vad_model):
+        """Torch models should get the same input tensor on every window."""
+        model = Mock(wraps=mock_vad_model)
+        with patch.object(recorder, 'vad_model', model):
+            recorder._detect_voice_activity(rand_audio[:512])
+            recorder._detect_voice_activity(rand_audio[512:1024])
+
+        first, second = (call[0][0] for call in model.call_args_list)
+        assert first is second
+        assert np.array_equal(second.numpy(), rand_audio[512:1024])
+
+    def test_vad_runner_built_once_per_model(self, recorder, rand_audio, mock_vad_model):
+        """The specialized VAD call should be rebuilt only when the model changes."""
+        other_model = _FakeVAD()
+        recorder._vad_runner_model = None  # Shared recorder: forget earlier runners
+        with patch.object(recorder, '_make_vad_runner',
+                          wraps=recorder._make_vad_runner) as make_runner:
+            recorder._detect_voice_activity(rand_audio[:512])
+            recorder._detect_voice_activity(rand_audio[:512])
+            with patch.object(recorder, 'vad_model', other_model):
+                recorder._detect_voice_activity(rand_audio[:512])
+
+        assert [call[0][0] for call in make_runner.call_args_list] == [
+            mock_vad_model, other_model]
+
+    def test_detect_voice_activity_numpy_model(self, recorder, rand_audio):
+        """Models that accept numpy (ONNX backend) should get the array itself."""
+        audio = rand_audio[:512]
+        numpy_model = Mock(return_value=np.array([[0.9]], dtype=np.float32))
+        numpy_model.accepts_numpy = True
+
+        with patch.object(recorder, 'vad_model', numpy_model):
+            assert recorder._detect_voice_activity(audio) is True
+
+        passed = numpy_model.call_args[0][0]
+        assert isinstance(passed, np.ndarray)
+        assert np.shares_memory(passed, audio)
+
+    def test_process_vad_speech_detected(self, recorder, rand_audio):
         """Should reset silence tracking when speech detected."""
         recorder.silence_start_time = 123.456
         recorder.consecutive_silence_count = 5
 
         with patch.object(recorder, '_detect_voice_activity', return_value=True):
-            recent_audio = np.random.randn(512).astype(np.float32)
+            recent_audio = rand_audio[:512]
             recorder._process_vad(recent_audio)
 
         assert recorder.silence_start_time is None
@@ -258,38 +397,417 @@ class TestContinuousRecorder:
         recorder.consecutive_silence_count = 0
 
         with patch.object(recorder, '_detect_voice_activity', return_value=False):
-            with patch('time.time', return_value=100.0):
-                recent_audio = np.zeros(512, dtype=np.float32)
+            recent_audio = np.zeros(512, dtype=np.float32)
+
+            # First detection
+            recorder._process_vad(recent_audio, now=100.0)
+            assert recorder.consecutive_silence_count == 1
+            assert recorder.silence_start_time is None  # Not enough consecutive
+
+            # Second detection - should start timer
+            recorder._process_vad(recent_audio, now=100.0)
+            assert recorder.consecutive_silence_count == 2
+            assert recorder.silence_start_time == 100.0
+
+    def test_process_vad_skips_model_on_quiet_windows(self, recorder):
+        """Quiet windows should count as silence, with the model rerun each second."""
+        quiet = np.full(512, 0.001, dtype=np.float32)
+        with patch.object(recorder, '_detect_voice_activity', return_value=True) as detect:
+            for now in (0.5, 1.0, 1.5, 2.0):
+                recorder._process_vad(quiet, now=now)
+            recorder._process_vad(np.full(512, 0.1, dtype=np.float32), now=2.5)
+
+        assert [c.args[0][0] for c in detect.call_args_list] == [
+            pytest.approx(0.001), pytest.approx(0.001), pytest.approx(0.1)]
+        assert recorder._last_vad_run == 2.5
+
+    def test_process_vad_skip_disabled(self, recorder):
+        """A skip amplitude of 0 should run the model on every window."""
+        quiet = np.full(512, 0.001, dtype=np.float32)
+        recorder.vad_skip_amplitude = 0.0
+        try:
+            with patch.object(recorder, '_detect_voice_activity', return_value=False) as detect:
+                for now in (0.5, 1.0, 1.5):
+                    recorder._process_vad(quiet, now=now)
+        finally:
+            recorder.vad_skip_amplitude = 0.005
+
+        assert detect.call_count == 3
+
+    def test_process_vad_batched(self, recorder):
+        """Should run the model once per full batch of windows."""
+        recorder.vad_batch_size = 4
+        batch_detect = MagicMock(return_value=[False, False, True, False])
+        try:
+            with patch.object(recorder, '_detect_voice_activity_batch', batch_detect):
+                for i in range(3):
+                    recorder._process_vad(np.full(512, i, dtype=np.float32))
+                assert not batch_detect.called
+                assert recorder.consecutive_silence_count == 0
+
+                recorder._process_vad(np.full(512, 3, dtype=np.float32))
+        finally:
+            recorder.vad_batch_size = 1
+
+        windows = batch_detect.call_args[0][0]
+        assert windows.shape == (4, 512)
+        assert windows[:, 0].tolist() == [0, 1, 2, 3]
+        # Speech in the third window resets the count before the last one
+        assert recorder.consecutive_silence_count == 1
+        assert recorder._vad_batch == []
+
+    def test_detect_voice_activity_windows_carries_tail(self, recorder, rand_audio):
+        """Should run every full window in order and carry the remainder."""
+        seen = []
+        runner = MagicMock(side_effect=lambda w: seen.append(w[0]) or _FakeVADResult(0.8))
+        with patch.object(recorder, '_run_vad', runner):
+            first = recorder._detect_voice_activity_windows(rand_audio[:1200])
+            second = recorder._detect_voice_activity_windows(rand_audio[1200:1600])
+
+        assert first.tolist() == [True, True]
+        assert second.tolist() == [True]
+        assert seen == [rand_audio[0], rand_audio[512], rand_audio[1024]]
+        assert len(recorder._vad_carry) == 1600 - 3 * 512
+
+    def test_detect_voice_activity_windows_hop(self, recorder, rand_audio):
+        """A 1024-sample hop should run the last window of each hop."""
+        seen = []
+        runner = MagicMock(side_effect=lambda w: seen.append(w[0]) or _FakeVADResult(0.8))
+        recorder.vad_hop = 1024
+        try:
+            with patch.object(recorder, '_run_vad', runner):
+                decisions = recorder._detect_voice_activity_windows(rand_audio[:2348])
+        finally:
+            recorder.vad_hop = 512
+
+        assert decisions.tolist() == [True, True]
+        assert seen == [rand_audio[512], rand_audio[1536]]
+        assert len(recorder._vad_carry) == 300
+
+    def test_block_waiting_on_finalize_is_dropped(self, recorder, rand_audio, mock_tcp_server):
+        """A block that arrives mid-finalize should not touch the saved session."""
+        import threading
+        recorder.recording = True
+        recorder.current_chunk_start_time = 0.0
+        with recorder._session_lock:
+            late = threading.Thread(target=recorder.audio_callback,
+                                    args=(rand_audio[:4096, None], 4096, None, None))
+            late.start()
+            late.join(timeout=0.2)
+            assert late.is_alive()  # Waiting for the session lock
+            recorder._finalize_recording()
+        late.join(timeout=2.0)
+
+        assert not late.is_alive()
+        assert len(recorder.current_chunk_audio) == 0
+        assert recorder._recording_writer is None
+        assert mock_tcp_server.send_event.call_args_list[-1][0] == ("recording_stopped",)
+
+    def test_audio_callback_keeps_no_reference_to_indata(self, recorder, rand_audio):
+        """Should copy what it keeps, since sounddevice reuses indata."""
+        recorder.recording = True
+        recorder.current_chunk_start_time = 0.0
+        indata = rand_audio[:4096].reshape(-1, 1).copy()
+        recorder.audio_callback(indata, 4096, None, None)
+        indata[:] = 0
 
-                # First detection
-                recorder._process_vad(recent_audio)
-                assert recorder.consecutive_silence_count == 1
-                assert recorder.silence_start_time is None  # Not enough consecutive
+        assert np.array_equal(recorder.current_chunk_audio.view(), convert_to_int16(rand_audio[:4096]))
+        rate, data = scipy.io.wavfile.read(recorder._save_complete_recording())
+        assert np.array_equal(data, convert_to_int16(rand_audio[:4096]))
+        assert np.array_equal(recorder._get_recent_audio(), rand_audio[4096 - 512:4096])
 
-                # Second detection - should start timer
-                recorder._process_vad(recent_audio)
-                assert recorder.consecutive_silence_count == 2
-                assert recorder.silence_start_time == 100.0
+    def test_microphone_blocks_processed_off_callback_thread(self, recorder, rand_audio):
+        """Queued microphone blocks should be processed in order by the worker."""
+        import threading
+        from whisper_stream import AudioBlockRing
 
-    def test_save_complete_recording(self, recorder):
-        """Should save complete recording with timestamp."""
-        recorder.all_audio = [
-            np.random.randn(8000).astype(np.float32),
-            np.random.randn(8000).astype(np.float32)
-        ]
+        recorder.recording = True
+        recorder.current_chunk_start_time = 0.0
+        ring = recorder._audio_ring = AudioBlockRing(4, 1024)
+        stop = threading.Event()
+        worker = recorder._audio_worker = threading.Thread(
+            target=recorder._process_audio_blocks, args=(ring, stop))
+        worker.start()
+        try:
+            for start in range(0, 4096, 1024):
+                recorder._enqueue_audio(rand_audio[start:start + 1024, None], 1024, None, None)
+            assert ring.drain(timeout=2.0)
+        finally:
+            stop.set()
+            worker.join()
+            recorder._audio_ring = recorder._audio_worker = None
+
+        assert np.array_equal(recorder.current_chunk_audio.view(), convert_to_int16(rand_audio[:4096]))
+
+    def test_finalize_keeps_partial_block(self, recorder, rand_audio):
+        """Audio short of a full ring block at stop should reach the final chunk."""
+        import threading
+        import time
+        from whisper_stream import AudioBlockRing
+
+        recorder.recording = True
+        recorder.current_chunk_start_time = 0.0
+        ring = recorder._audio_ring = AudioBlockRing(4, 1024)
+        stop = threading.Event()
+        worker = recorder._audio_worker = threading.Thread(
+            target=recorder._process_audio_blocks, args=(ring, stop))
+        worker.start()
+
+        def audio_thread():
+            # Next callback after the stop request, as PortAudio would make
+            while not ring._flush_requested.is_set():
+                time.sleep(0.001)
+            recorder._enqueue_audio(rand_audio[1324:1334, None], 10, None, None)
+
+        recorder._enqueue_audio(rand_audio[:1324, None], 1324, None, None)
+        producer = threading.Thread(target=audio_thread)
+        producer.start()
+        try:
+            with patch('whisper_stream.write_pcm16_wav') as mock_write:
+                recorder._finalize_recording()
+        finally:
+            producer.join()
+            stop.set()
+            worker.join()
+            recorder._audio_ring = recorder._audio_worker = None
+
+        assert np.array_equal(mock_write.call_args[0][2], convert_to_int16(rand_audio[:1334]))
+
+    def test_dropped_audio_reported_in_ms(self, recorder, rand_audio, mock_tcp_server):
+        """Samples that don't fit the ring should be reported as milliseconds lost."""
+        import threading
+        from whisper_stream import AudioBlockRing
+
+        recorder.recording = True
+        ring = recorder._audio_ring = AudioBlockRing(1, 1024)
+        try:
+            recorder._enqueue_audio(rand_audio[:1024, None], 1024, None, None)
+            recorder._enqueue_audio(rand_audio[:800, None], 800, None, None)
+            assert recorder._dropped_samples == 800
+
+            stop = threading.Event()
+            with patch.object(recorder, 'audio_callback', side_effect=lambda *a: stop.set()):
+                recorder._process_audio_blocks(ring, stop)
+        finally:
+            recorder._audio_ring = None
+            recorder._dropped_samples = 0
+
+        mock_tcp_server.send_event.assert_called_once_with(
+            "error", error="Audio processing fell behind: 50 ms of audio dropped")
+
+    def test_audio_callback_full_block_vad(self, recorder, mock_vad_model):
+        """Should make one silence decision per callback from all its windows."""
+        recorder.recording = True
+        recorder.vad_full_block = True
+        recorder.current_chunk_start_time = 0.0
+        block = np.full((8000, 1), 0.1, dtype=np.float32)
+        try:
+            mock_vad_model.p = 0.1
+            recorder.audio_callback(block, 8000, None, None)
+            assert recorder.consecutive_silence_count == 1
+            mock_vad_model.p = 0.8
+            recorder.audio_callback(block, 8000, None, None)
+            assert recorder.consecutive_silence_count == 0
+        finally:
+            recorder.vad_full_block = False
+
+    def test_durations_follow_sample_count(self, recorder):
+        """Max chunk duration should be reached after exactly that much audio."""
+        recorder.recording = True
+        recorder.current_chunk_start_time = recorder._clock()
+        block = np.full((8000, 1), 0.1, dtype=np.float32)
+        with patch.object(recorder, '_queue_chunk') as queue_chunk:
+            for _ in range(19):
+                recorder.audio_callback(block, 8000, None, None)
+            assert not queue_chunk.called
+            recorder.audio_callback(block, 8000, None, None)
+
+        queue_chunk.assert_called_once_with(10.0)
+
+    def test_save_complete_recording(self, recorder, rand_audio):
+        """Should stream the complete recording to a timestamped file."""
+        recorder._buffer_audio(rand_audio[:8000])
+        recorder._buffer_audio(rand_audio[:8000])
 
-        with patch('scipy.io.wavfile.write') as mock_write:
-            complete_file = recorder._save_complete_recording()
+        complete_file = recorder._save_complete_recording()
 
         assert complete_file is not None
         assert "test-" in complete_file
         assert ".wav" in complete_file
-        mock_write.assert_called_once()
+        rate, data = scipy.io.wavfile.read(complete_file)
+        assert rate == 16000
+        assert np.array_equal(data, convert_to_int16(np.tile(rand_audio[:8000], 2)))
+        assert recorder._save_complete_recording() is None
+
+    def test_block_after_save_opens_no_file(self, recorder, rand_audio, temp_dir):
+        """A block racing the stop should not start another recording file."""
+        recorder._buffer_audio(rand_audio[:8000])
+        complete_file = recorder._save_complete_recording()
+        before = sorted(temp_dir.iterdir())
+
+        recorder._buffer_audio(rand_audio[:8000])
+
+        assert recorder._recording_writer is None
+        assert sorted(temp_dir.iterdir()) == before
+        assert not any(p.suffix == ".part" for p in before)
+        rate, data = scipy.io.wavfile.read(complete_file)
+        assert len(data) == 8000
+
+    def test_complete_recording_size_limit(self, recorder, rand_audio, mock_tcp_server):
+        """Hitting the WAV size limit should be reported once, chunks unaffected."""
+        recorder._buffer_audio(rand_audio[:1000])
+        recorder._recording_writer.max_data_bytes = 3000
+        mock_tcp_server.send_event.reset_mock()
+        recorder._buffer_audio(rand_audio[:1000])
+        recorder._buffer_audio(rand_audio[:1000])
+
+        mock_tcp_server.send_event.assert_called_once()
+        assert mock_tcp_server.send_event.call_args[0][0] == "error"
+        assert len(recorder.current_chunk_audio) == 3000
+        rate, data = scipy.io.wavfile.read(recorder._save_complete_recording())
+        assert len(data) == 1500
+
+    def test_recording_file_unique_per_session(self, recorder, temp_dir):
+        """A .part file left by an earlier run should not be overwritten."""
+        stale = temp_dir / "test-recording.wav.part"
+        stale.write_bytes(b"earlier capture")
+
+        recorder._reset_recording_state()
+
+        assert recorder._recording_writer.path != stale
+        assert stale.read_bytes() == b"earlier capture"
+        stale.unlink()
+
+    def test_unfinished_recording_closed_at_exit(self, recorder, rand_audio, temp_dir):
+        """Audio of a session cut short by shutdown should end up in a valid WAV."""
+        recorder.recording = True
+        recorder._buffer_audio(rand_audio[:8000])
+
+        saved = recorder._close_unfinished_recording()
+
+        assert not recorder.recording
+        assert not any(p.suffix == ".part" for p in temp_dir.iterdir())
+        assert saved.endswith(".wav")
+        rate, data = scipy.io.wavfile.read(saved)
+        assert len(data) == 8000
 
     def test_save_complete_recording_empty(self, recorder):
         """Should handle empty recording."""
-        recorder.all_audio = []
-
         complete_file = recorder._save_complete_recording()
 
         assert complete_file is None
+
+
+class _FakeOrtSession:
+    """Records the feeds of each run() and advances the state by one."""
+
+    def __init__(self):
+        self.feeds = []
+
+    def run(self, output_names, feeds):
+        self.feeds.append({name: np.array(value) for name, value in feeds.items()})
+        batch = feeds['input'].shape[0]
+        return np.full((batch, 1), 0.5, dtype=np.float32), feeds['state'] + 1
+
+
+class _FakeIOBinding:
+    """Remembers bound buffers by address, like ORT's CPU IOBinding."""
+
+    def __init__(self):
+        self.buffers = {}
+
+    def bind_input(self, name, device_type, device_id, element_type, shape, buffer_ptr):
+        self.buffers[name] = (element_type, shape, buffer_ptr)
+
+    bind_output = bind_input
+
+    def array(self, name):
+        element_type, shape, buffer_ptr = self.buffers[name]
+        size = int(np.prod(shape)) * np.dtype(element_type).itemsize
+        raw = (ctypes.c_char * size).from_address(buffer_ptr)
+        return np.frombuffer(raw, dtype=element_type).reshape(shape)
+
+
+class _FakeBindingSession(_FakeOrtSession):
+    """Fake session that runs through IOBinding, reading bound memory."""
+
+    def __init__(self):
+        super().__init__()
+        self.bindings = 0
+
+    def get_outputs(self):
+        return [SimpleNamespace(name='output'), SimpleNamespace(name='stateN')]
+
+    def io_binding(self):
+        self.bindings += 1
+        return _FakeIOBinding()
+
+    def run_with_iobinding(self, io):
+        out, state = self.run(None, {name: io.array(name) for name in ('input', 'state', 'sr')})
+        io.array('output')[...] = out
+        io.array('stateN')[...] = state
+
+
+class TestOnnxSileroVAD:
+    """Test the ONNX Runtime VAD wrapper against a fake session."""
+
+    def test_context_and_state_carried_between_calls(self, rand_audio):
+        """Each call should see the previous window's tail and updated state."""
+        session = _FakeOrtSession()
+        vad = OnnxSileroVAD(session)
+        first, second = rand_audio[:512], rand_audio[512:1024]
+
+        assert vad(first, 16000).item() == 0.5
+        vad(second, 16000)
+
+        feed1, feed2 = session.feeds
+        assert feed1['input'].shape == (1, 576)
+        assert not feed1['input'][0, :64].any()
+        assert np.array_equal(feed1['input'][0, 64:], first)
+        assert np.array_equal(feed2['input'][0, :64], first[-64:])
+        assert np.array_equal(feed2['input'][0, 64:], second)
+        assert (feed2['state'] == 1).all()
+        assert feed2['sr'].dtype == np.int64 and feed2['sr'] == 16000
+
+    def test_io_binding_reused_between_calls(self, rand_audio):
+        """Bound buffers should carry the window, context and state without rebinding."""
+        session = _FakeBindingSession()
+        vad = OnnxSileroVAD(session)
+        first, second = rand_audio[:512], rand_audio[512:1024]
+
+        assert vad(first, 16000).item() == 0.5
+        vad(second, 16000)
+
+        feed1, feed2 = session.feeds
+        assert session.bindings == 1
+        assert np.array_equal(feed1['input'][0, 64:], first)
+        assert np.array_equal(feed2['input'][0, :64], first[-64:])
+        assert np.array_equal(feed2['input'][0, 64:], second)
+        assert (feed2['state'] == 1).all()
+        assert feed2['sr'] == 16000
+        assert (vad._state == 2).all()
+
+        vad.reset_states()
+        vad(first, 16000)
+        assert session.bindings == 2
+        assert not session.feeds[-1]['state'].any()
+
+    def test_batch_size_change_resets(self, rand_audio):
+        """A new batch size should start from fresh state and empty context."""
+        session = _FakeOrtSession()
+        vad = OnnxSileroVAD(session)
+        vad(rand_audio[:512], 16000)
+
+        out = vad(rand_audio[:1024].reshape(2, 512), 16000)
+
+        assert out.shape == (2, 1)
+        feed = session.feeds[-1]
+        assert feed['state'].shape == (2, 2, 128)
+        assert not feed['state'].any()
+        assert not feed['input'][:, :64].any()
+
+    def test_optimized_graph_cached_next_to_model(self, tmp_path):
+        """The fused graph should be cached beside the source model."""
+        model = tmp_path / 'silero_vad.onnx'
+        assert OnnxSileroVAD.optimized_path(model) == tmp_path / 'silero_vad.opt.onnx'
+        assert OnnxSileroVAD.optimized_path(str(model)) == tmp_path / 'silero_vad.opt.onnx'
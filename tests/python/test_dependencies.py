@@ -1,103 +1,147 @@
 """
 Unit tests for dependency checking in whisper_stream.py
 """
-import pytest
+import hashlib
+import io
+import json
 import sys
 from pathlib import Path
-import importlib
+
+import pytest
 from unittest.mock import MagicMock
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from whisper_stream import (check_dependencies, _find_silero_onnx_model, _find_silero_jit_model,
+                           _download_silero_onnx_model, main)
+
+
+def _find_spec_without(*missing):
+    """Build a find_spec replacement that reports the given modules missing."""
+    return lambda name: None if name in missing else MagicMock()
 
 
 class TestCheckDependencies:
     """Test dependency checking function."""
 
-    def setup_method(self):
-        """Save original sys.modules state."""
-        self.original_modules = sys.modules.copy()
-        # Reload whisper_stream to clear any cached imports
-        if 'whisper_stream' in sys.modules:
-            del sys.modules['whisper_stream']
-
-    def teardown_method(self):
-        """Restore original sys.modules state."""
-        # Clear the whisper_stream module to reset its imports
-        if 'whisper_stream' in sys.modules:
-            del sys.modules['whisper_stream']
-
-        # Completely restore sys.modules to original state
-        # First, remove anything we added
-        keys_to_remove = [k for k in sys.modules.keys() if k not in self.original_modules]
-        for key in keys_to_remove:
-            del sys.modules[key]
-
-        # Then restore/fix any modules that were mocked (set to None or MagicMock)
-        for key in list(sys.modules.keys()):
-            if key in self.original_modules:
-                # If current is None/Mock but original was real module, restore it
-                if self.original_modules[key] is not None:
-                    if (sys.modules[key] is None or
-                        type(sys.modules[key]).__name__ == 'MagicMock'):
-                        sys.modules[key] = self.original_modules[key]
-
-        # Finally, add back any modules that were removed
-        for key, value in self.original_modules.items():
-            if key not in sys.modules and value is not None:
-                sys.modules[key] = value
-
     def test_all_dependencies_present(self):
         """Should return empty list when all deps are installed."""
-        from whisper_stream import check_dependencies
         missing = check_dependencies()
         # May or may not be empty depending on test environment
         assert isinstance(missing, list)
 
+    def test_all_dependencies_found(self):
+        """Should report nothing when every module resolves."""
+        assert check_dependencies(find_spec=_find_spec_without()) == []
+
     def test_missing_sounddevice(self):
         """Should detect missing sounddevice."""
-        # Remove sounddevice from sys.modules if present
-        sys.modules['sounddevice'] = None  # None triggers ImportError
-
-        # Import and run check_dependencies
-        import whisper_stream
-        importlib.reload(whisper_stream)
-        missing = whisper_stream.check_dependencies()
+        missing = check_dependencies(find_spec=_find_spec_without('sounddevice'))
 
         assert any('sounddevice' in dep for dep in missing)
 
     def test_missing_torch_and_onnx(self):
         """Should detect when both torch and onnx are missing."""
-        sys.modules['torch'] = None
-        sys.modules['onnxruntime'] = None
-
-        import whisper_stream
-        importlib.reload(whisper_stream)
-        missing = whisper_stream.check_dependencies()
+        missing = check_dependencies(find_spec=_find_spec_without('torch', 'onnxruntime'))
 
         assert any('torch or onnxruntime' in dep for dep in missing)
 
     def test_torch_present_onnx_missing(self):
         """Should not report missing when torch is present."""
-        # Mock torch as present
-        sys.modules['torch'] = MagicMock()
-        sys.modules['onnxruntime'] = None
-
-        import whisper_stream
-        importlib.reload(whisper_stream)
-        missing = whisper_stream.check_dependencies()
+        missing = check_dependencies(find_spec=_find_spec_without('onnxruntime'))
 
         # Should not complain about torch/onnx if torch is present
         assert not any('torch or onnxruntime' in dep for dep in missing)
 
     def test_missing_scipy(self):
         """Should detect missing scipy."""
-        sys.modules['scipy'] = None
-        sys.modules['scipy.io'] = None
-        sys.modules['scipy.io.wavfile'] = None
-
-        import whisper_stream
-        importlib.reload(whisper_stream)
-        missing = whisper_stream.check_dependencies()
+        missing = check_dependencies(find_spec=_find_spec_without('scipy'))
 
         assert any('scipy' in dep for dep in missing)
+
+    def test_module_without_spec_counts_as_present(self):
+        """Modules injected without a __spec__ should count as installed."""
+        def find_spec(name):
+            raise ValueError(f"{name}.__spec__ is not set")
+
+        assert check_dependencies(find_spec=find_spec) == []
+
+
+class TestCheckDepsCommand:
+    """Test the --check-deps command line path."""
+
+    @pytest.mark.parametrize("argv, code, expected", [
+        (["--check-deps"], 0, {"status": "ok"}),
+        (["--check-deps", "--vad-full-block"], 0, {"status": "ok"}),
+    ])
+    def test_reports_ok(self, monkeypatch, capsys, argv, code, expected):
+        """Should print the JSON status and exit, with or without other flags."""
+        monkeypatch.setattr(sys, "argv", ["whisper_stream.py", *argv])
+        monkeypatch.setattr("whisper_stream.check_dependencies", lambda: [])
+        with pytest.raises(SystemExit) as exc:
+            main()
+        assert exc.value.code == code
+        assert json.loads(capsys.readouterr().out) == expected
+
+    def test_reports_missing(self, monkeypatch, capsys):
+        """Should exit 1 and list missing modules."""
+        monkeypatch.setattr(sys, "argv", ["whisper_stream.py", "--check-deps"])
+        monkeypatch.setattr("whisper_stream.check_dependencies", lambda: ["scipy"])
+        with pytest.raises(SystemExit) as exc:
+            main()
+        assert exc.value.code == 1
+        assert json.loads(capsys.readouterr().out) == {"status": "error", "missing": ["scipy"]}
+
+
+class TestFindSileroOnnxModel:
+    """Test locating silero_vad.onnx for the ONNX Runtime backend."""
+
+    def test_env_override(self, monkeypatch, tmp_path):
+        """SILERO_VAD_ONNX should win over the torch.hub cache."""
+        monkeypatch.setenv('SILERO_VAD_ONNX', str(tmp_path / 'vad.onnx'))
+        assert _find_silero_onnx_model() == tmp_path / 'vad.onnx'
+
+    def test_torch_hub_cache(self, monkeypatch, tmp_path):
+        """Should find the model torch.hub cached, and None without it."""
+        monkeypatch.delenv('SILERO_VAD_ONNX', raising=False)
+        monkeypatch.setenv('TORCH_HOME', str(tmp_path))
+        assert _find_silero_onnx_model() is None
+
+        model = (tmp_path / 'hub' / 'snakers4_silero-vad_master' / 'src'
+                 / 'silero_vad' / 'data' / 'silero_vad.onnx')
+        model.parent.mkdir(parents=True)
+        model.touch()
+        assert _find_silero_onnx_model() == model
+
+    def test_script_models_dir(self, monkeypatch, tmp_path):
+        """A model in the models/ directory should win over the hub cache."""
+        monkeypatch.delenv('SILERO_VAD_JIT', raising=False)
+        monkeypatch.setenv('TORCH_HOME', str(tmp_path / 'torch'))
+        monkeypatch.setattr('whisper_stream.SILERO_MODEL_DIR', tmp_path)
+        assert _find_silero_jit_model() is None
+
+        (tmp_path / 'silero_vad.jit').touch()
+        assert _find_silero_jit_model() == tmp_path / 'silero_vad.jit'
+
+    def test_download_lands_in_search_path(self, monkeypatch, tmp_path):
+        """A downloaded model should be found by later lookups."""
+        import urllib.request
+        monkeypatch.delenv('SILERO_VAD_ONNX', raising=False)
+        monkeypatch.setenv('TORCH_HOME', str(tmp_path / 'torch'))
+        monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+        monkeypatch.setattr('whisper_stream.SILERO_MODEL_DIR', tmp_path / 'models')
+        monkeypatch.setattr(urllib.request, 'urlopen', lambda url, timeout: io.BytesIO(b'onnx'))
+        monkeypatch.setattr('whisper_stream.SILERO_ONNX_SHA256', hashlib.sha256(b'onnx').hexdigest())
+
+        path = _download_silero_onnx_model()
+        assert path.read_bytes() == b'onnx'
+        assert not path.with_suffix('.part').exists()
+        assert _find_silero_onnx_model() == path
+
+    def test_download_checksum_mismatch(self, monkeypatch, tmp_path):
+        """A file that doesn't match the pinned hash should not be kept."""
+        import urllib.request
+        monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+        monkeypatch.setattr(urllib.request, 'urlopen', lambda url, timeout: io.BytesIO(b'tampered'))
+
+        with pytest.raises(ValueError):
+            _download_silero_onnx_model()
+        assert list((tmp_path / 'cache' / 'silero-vad').iterdir()) == []
@@ -2,86 +2,62 @@
 Unit tests for event output functions in whisper_stream.py
 """
 import pytest
+import contextlib
+import io
 import json
-import sys
-from pathlib import Path
-from io import StringIO
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+import numpy as np
 
 from whisper_stream import output_event, output_error, output_debug
 
 
-class TestEventOutput:
-    """Test event output functions."""
-
-    def test_output_event_basic(self, capsys):
-        """Should output JSON event to stdout."""
-        output_event("test_event", foo="bar", num=42)
-
-        captured = capsys.readouterr()
-        event = json.loads(captured.out.strip())
-
-        assert event["type"] == "test_event"
-        assert event["foo"] == "bar"
-        assert event["num"] == 42
-
-    def test_output_event_no_kwargs(self, capsys):
-        """Should output event with only type."""
-        output_event("simple")
-
-        captured = capsys.readouterr()
-        event = json.loads(captured.out.strip())
-
-        assert event["type"] == "simple"
-        assert len(event) == 1
+def _raise_and_report():
+    """Report a caught exception the way the recorder does."""
+    try:
+        raise ValueError("Test exception")
+    except ValueError as e:
+        output_error(e)
+
+
+OUTPUT_CASES = [
+    pytest.param(lambda: output_event("test_event", foo="bar", num=42),
+                 {"type": "test_event", "foo": "bar", "num": 42}, id="kwargs"),
+    pytest.param(lambda: output_event("simple"),
+                 {"type": "simple"}, id="type-only"),
+    pytest.param(lambda: output_error("Something went wrong"),
+                 {"type": "error", "error": "Something went wrong"}, id="error"),
+    pytest.param(lambda: output_debug("Debug message"),
+                 {"type": "debug", "message": "Debug message"}, id="debug"),
+    pytest.param(lambda: output_event("complex", array=[1, 2, 3], nested={"key": "value"},
+                                      boolean=True, null=None),
+                 {"type": "complex", "array": [1, 2, 3], "nested": {"key": "value"},
+                  "boolean": True, "null": None}, id="complex"),
+    # Exceptions are converted to strings
+    pytest.param(_raise_and_report,
+                 {"type": "error", "error": "Test exception"}, id="exception"),
+    # Numpy scalars are encoded as plain JSON numbers
+    pytest.param(lambda: output_event("numpy", chunk_num=np.int64(3), level=np.float32(0.5)),
+                 {"type": "numpy", "chunk_num": 3, "level": 0.5}, id="numpy"),
+]
 
-    def test_output_error(self, capsys):
-        """Should output error event."""
-        output_error("Something went wrong")
 
-        captured = capsys.readouterr()
-        event = json.loads(captured.out.strip())
-
-        assert event["type"] == "error"
-        assert event["error"] == "Something went wrong"
-
-    def test_output_debug(self, capsys):
-        """Should output debug event."""
-        output_debug("Debug message")
-
-        captured = capsys.readouterr()
-        event = json.loads(captured.out.strip())
-
-        assert event["type"] == "debug"
-        assert event["message"] == "Debug message"
-
-    def test_output_event_complex_data(self, capsys):
-        """Should handle complex data structures."""
-        output_event("complex",
-                    array=[1, 2, 3],
-                    nested={"key": "value"},
-                    boolean=True,
-                    null=None)
-
-        captured = capsys.readouterr()
-        event = json.loads(captured.out.strip())
+class TestEventOutput:
+    """Test event output functions."""
 
-        assert event["array"] == [1, 2, 3]
-        assert event["nested"] == {"key": "value"}
-        assert event["boolean"] is True
-        assert event["null"] is None
+    @pytest.mark.parametrize("emit, expected", OUTPUT_CASES)
+    def test_output_event_shape(self, capsys, emit, expected):
+        """Should write exactly one JSON event line with the expected fields."""
+        emit()
 
-    def test_output_error_with_exception(self, capsys):
-        """Should convert exceptions to strings."""
-        try:
-            raise ValueError("Test exception")
-        except ValueError as e:
-            output_error(e)
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0]) == expected
 
-        captured = capsys.readouterr()
-        event = json.loads(captured.out.strip())
+    def test_output_event_text_stdout(self):
+        """Should fall back to text writes when stdout has no byte buffer."""
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            output_event("simple", foo="bar")
 
-        assert event["type"] == "error"
-        assert "Test exception" in event["error"]
+        assert json.loads(out.getvalue()) == {"type": "simple", "foo": "bar"}
+        assert out.getvalue().endswith("\n")
@@ -9,79 +9,40 @@ These tests inject audio from WAV files to verify:
 - File output
 """
 import pytest
-import sys
 import json
 import socket
 import threading
-import time
 from pathlib import Path
 from unittest.mock import MagicMock
 import numpy as np
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-
 from whisper_stream import FileAudioSource, ContinuousRecorder, TCPServer
 
-
-class MockTCPServer:
-    """Mock TCP server that captures events for testing."""
-
-    def __init__(self):
-        self.events = []
-        self.commands = []
-
-    def send_event(self, event_type, **kwargs):
-        """Capture events instead of sending over network."""
-        self.events.append({"type": event_type, **kwargs})
-        return True
-
-    def receive_command(self, timeout=0.1):
-        """Return queued commands."""
-        if self.commands:
-            return self.commands.pop(0)
-        time.sleep(timeout)
-        return None
-
-    def wait_for_reconnect(self, timeout=60):
-        """Mock reconnect wait."""
-        return False
+from .mock_tcp_server import MockTCPServer
 
 
 class TestFileAudioSource:
     """Test FileAudioSource class."""
 
-    def test_load_wav_file(self):
+    def test_load_wav_file(self, file_source, chunk_short_path):
         """Should load WAV file successfully."""
-        test_file = Path("tests/fixtures/audio/chunks/chunk_short.wav")
-        if not test_file.exists():
-            pytest.skip("Test audio file not found")
-
-        source = FileAudioSource(test_file)
+        source = file_source(chunk_short_path)
         assert source.sample_rate == 16000
         assert source.chunk_size == 8000  # 0.5s * 16000
         assert len(source.audio_data) > 0
 
-    def test_read_chunk(self):
+    def test_read_chunk(self, file_source, chunk_short_path):
         """Should read chunks of correct size."""
-        test_file = Path("tests/fixtures/audio/chunks/chunk_short.wav")
-        if not test_file.exists():
-            pytest.skip("Test audio file not found")
-
-        source = FileAudioSource(test_file)
+        source = file_source(chunk_short_path)
         chunk = source.read_chunk()
 
         assert chunk is not None
         assert chunk.shape == (8000, 1)  # (chunk_size, 1) to match sounddevice
         assert chunk.dtype == np.float32
 
-    def test_read_all_chunks(self):
+    def test_read_all_chunks(self, file_source, chunk_short_path):
         """Should read entire file as chunks."""
-        test_file = Path("tests/fixtures/audio/chunks/chunk_short.wav")
-        if not test_file.exists():
-            pytest.skip("Test audio file not found")
-
-        source = FileAudioSource(test_file)
+        source = file_source(chunk_short_path)
         chunks = []
 
         while True:
@@ -95,6 +56,58 @@ class TestFileAudioSource:
         for chunk in chunks:
             assert chunk.shape[0] == 8000
 
+    def test_pcm16_decode_matches_scipy(self, tmp_path):
+        """Memory-mapped PCM16 samples should match scipy's decoder."""
+        import scipy.io.wavfile
+        from whisper_stream import _memmap_pcm16_wav
+
+        rng = np.random.default_rng(0)
+        for name, samples in [("mono.wav", rng.integers(-32768, 32768, 1001)),
+                              ("stereo.wav", rng.integers(-32768, 32768, (999, 2)))]:
+            path = tmp_path / name
+            scipy.io.wavfile.write(str(path), 16000, samples.astype(np.int16))
+
+            sample_rate, data = _memmap_pcm16_wav(path)
+            assert sample_rate == 16000
+            assert np.array_equal(data, scipy.io.wavfile.read(str(path))[1])
+
+    def test_float_wav_falls_back(self, tmp_path):
+        """Non-PCM16 files should still load through scipy."""
+        import scipy.io.wavfile
+        path = tmp_path / "float.wav"
+        scipy.io.wavfile.write(str(path), 16000, np.full(8000, 0.25, dtype=np.float32))
+
+        source = FileAudioSource(path)
+        assert np.allclose(source.read_chunk(), 0.25)
+
+    def test_24bit_wav_falls_back(self, tmp_path):
+        """24-bit PCM, which scipy cannot memory-map, should still load."""
+        import wave
+        path = tmp_path / "pcm24.wav"
+        samples = np.arange(-4000, 4000, dtype=np.int32) * 256
+        with wave.open(str(path), 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(3)
+            f.setframerate(16000)
+            f.writeframes(samples.astype('<i4').view(np.uint8).reshape(-1, 4)[:, :3].tobytes())
+
+        source = FileAudioSource(path)
+        assert source.audio_data.dtype == np.float32
+        assert len(source.audio_data) == 8000
+
+    def test_resamples_to_target_rate(self, tmp_path):
+        """Files at another rate should be resampled to the requested rate."""
+        import scipy.io.wavfile
+        path = tmp_path / "48k.wav"
+        t = np.arange(48000) / 48000
+        scipy.io.wavfile.write(str(path), 48000, (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32))
+
+        source = FileAudioSource(path)
+        assert source.audio_data.dtype == np.float32
+        assert len(source.audio_data) == 16000
+        expected = 0.5 * np.sin(2 * np.pi * 440 * np.arange(16000) / 16000)
+        assert np.allclose(source.audio_data[1000:-1000], expected[1000:-1000], atol=1e-2)
+
     def test_nonexistent_file(self):
         """Should raise error for nonexistent file."""
         with pytest.raises(FileNotFoundError):
@@ -105,208 +118,73 @@ class TestFileAudioSource:
 class TestFileIntegration:
     """Integration tests with real audio files."""
 
-    def setup_method(self):
-        """Create temporary output directory."""
-        self.output_dir = Path("tests/tmp/integration_output")
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-
-        # Clean previous test files
-        for f in self.output_dir.glob("*.wav"):
-            f.unlink()
-
-    def teardown_method(self):
-        """Clean up test files."""
-        if self.output_dir.exists():
-            for f in self.output_dir.glob("*.wav"):
-                f.unlink()
-
-    def test_process_short_audio_file(self):
-        """Should process short audio file and detect speech."""
-        test_file = Path("tests/fixtures/audio/chunks/chunk_short.wav")
-        if not test_file.exists():
-            pytest.skip("Test audio file not found")
+    @pytest.mark.parametrize(
+        "audio_file, prefix, silence_threshold, min_chunk_duration, stop_first, expected_events",
+        [
+            # Should process short audio file and detect speech
+            pytest.param("chunk_short.wav", "test", 2.0, 1.0, True,
+                         ["server_ready", "recording_started", "recording_stopped"],
+                         id="process_short_audio_file"),
+            # Should detect and save chunks based on VAD (may or may not
+            # chunk depending on audio content)
+            pytest.param("chunk_medium.wav", "chunk_test", 1.0, 0.5, False,
+                         ["server_ready", "recording_started"],
+                         id="chunk_detection"),
+            # Should detect silence and trigger chunk boundaries
+            pytest.param("chunk_short.wav", "silence_test", 0.5, 0.2, True,
+                         ["recording_started", "recording_stopped"],
+                         id="silence_detection"),
+            # Should save complete recording file
+            pytest.param("chunk_short.wav", "complete_test", 2.0, 1.0, True,
+                         ["complete_file"],
+                         id="complete_file_output"),
+        ]
+    )
+    def test_recorder_flow(self, file_source, chunk_wav, silero_vad, tmp_path, audio_file, prefix,
+                           silence_threshold, min_chunk_duration, stop_first, expected_events):
+        """Should run a start/stop/shutdown session over a WAV file."""
+        test_file = chunk_wav(audio_file)
 
-        # Create file audio source
-        audio_source = FileAudioSource(test_file)
-
-        # Create mock TCP server
         tcp_server = MockTCPServer()
-
-        # Create recorder with file source
         recorder = ContinuousRecorder(
             tcp_server=tcp_server,
-            output_dir=str(self.output_dir),
-            filename_prefix="test",
-            silence_threshold=2.0,
-            min_chunk_duration=1.0,
+            output_dir=str(tmp_path),
+            filename_prefix=prefix,
+            silence_threshold=silence_threshold,
+            min_chunk_duration=min_chunk_duration,
             max_chunk_duration=30.0,
-            audio_source=audio_source
+            audio_source=file_source(test_file),
+            vad_model=silero_vad
         )
 
-        # Start recording in background thread
-        def run_recorder():
-            recorder.start()
-
-        # Queue commands with delays
-        def queue_commands():
-            time.sleep(0.2)  # Wait for server to be ready
-            tcp_server.commands.append({"command": "start_recording"})
-            time.sleep(0.5)  # Let it record
-            tcp_server.commands.append({"command": "stop_recording"})
-            time.sleep(0.3)  # Allow finalization
-            tcp_server.commands.append({"command": "shutdown"})
-
-        recorder_thread = threading.Thread(target=run_recorder, daemon=True)
-        command_thread = threading.Thread(target=queue_commands, daemon=True)
-
+        # Drive commands from this thread, each one gated on the recorder's
+        # own events, so a stalled recorder fails at the step that stalled
+        recorder_thread = threading.Thread(target=recorder.start, daemon=True)
         recorder_thread.start()
-        command_thread.start()
-
-        recorder_thread.join(timeout=10.0)
-        command_thread.join(timeout=1.0)
+        try:
+            assert tcp_server.wait_for_event("server_ready")
+            tcp_server.post_command("start_recording")
+            assert tcp_server.wait_for_event("recording_started")
+            if stop_first:
+                tcp_server.post_command("stop_recording")
+                assert tcp_server.wait_for_event("recording_stopped")  # Allow finalization
+            tcp_server.post_command("shutdown")
+            recorder_thread.join(timeout=5.0)
+            assert not recorder_thread.is_alive(), "Recorder did not shut down"
+        finally:
+            recorder.running = False
 
         # Verify events were captured
         event_types = [e["type"] for e in tcp_server.events]
-        assert "server_ready" in event_types
-        assert "recording_started" in event_types
-        assert "recording_stopped" in event_types
-
-        # Verify output files were created
-        output_files = list(self.output_dir.glob("test*.wav"))
-        assert len(output_files) > 0
-
-    def test_chunk_detection(self):
-        """Should detect and save chunks based on VAD."""
-        test_file = Path("tests/fixtures/audio/chunks/chunk_medium.wav")
-        if not test_file.exists():
-            pytest.skip("Test audio file not found")
-
-        audio_source = FileAudioSource(test_file)
-        tcp_server = MockTCPServer()
-
-        recorder = ContinuousRecorder(
-            tcp_server=tcp_server,
-            output_dir=str(self.output_dir),
-            filename_prefix="chunk_test",
-            silence_threshold=1.0,  # Shorter for testing
-            min_chunk_duration=0.5,
-            max_chunk_duration=30.0,
-            audio_source=audio_source
-        )
-
-        def run_recorder():
-            recorder.start()
-
-        def queue_commands():
-            time.sleep(0.2)
-            tcp_server.commands.append({"command": "start_recording"})
-            time.sleep(1.0)
-            tcp_server.commands.append({"command": "shutdown"})
-
-        recorder_thread = threading.Thread(target=run_recorder, daemon=True)
-        command_thread = threading.Thread(target=queue_commands, daemon=True)
-
-        recorder_thread.start()
-        command_thread.start()
-
-        recorder_thread.join(timeout=10.0)
-        command_thread.join(timeout=2.0)
-
-        # Check for chunk_ready events
-        chunk_events = [e for e in tcp_server.events if e["type"] == "chunk_ready"]
-        # Should have at least one chunk
-        assert len(chunk_events) >= 0  # May or may not chunk depending on audio content
-
-    def test_silence_detection(self):
-        """Should detect silence and trigger chunk boundaries."""
-        # This would require a test file with silence in it
-        # For now, just verify the mechanism works
-        test_file = Path("tests/fixtures/audio/chunks/chunk_short.wav")
-        if not test_file.exists():
-            pytest.skip("Test audio file not found")
-
-        audio_source = FileAudioSource(test_file)
-        tcp_server = MockTCPServer()
-
-        recorder = ContinuousRecorder(
-            tcp_server=tcp_server,
-            output_dir=str(self.output_dir),
-            filename_prefix="silence_test",
-            silence_threshold=0.5,
-            min_chunk_duration=0.2,
-            max_chunk_duration=30.0,
-            audio_source=audio_source
-        )
-
-        def run_recorder():
-            recorder.start()
-
-        def queue_commands():
-            time.sleep(0.2)
-            tcp_server.commands.append({"command": "start_recording"})
-            time.sleep(0.5)
-            tcp_server.commands.append({"command": "stop_recording"})
-            time.sleep(0.3)
-            tcp_server.commands.append({"command": "shutdown"})
-
-        recorder_thread = threading.Thread(target=run_recorder, daemon=True)
-        command_thread = threading.Thread(target=queue_commands, daemon=True)
-
-        recorder_thread.start()
-        command_thread.start()
-
-        recorder_thread.join(timeout=10.0)
-        command_thread.join(timeout=2.0)
-
-        # Verify basic flow worked
-        assert any(e["type"] == "recording_started" for e in tcp_server.events)
-        assert any(e["type"] == "recording_stopped" for e in tcp_server.events)
-
-    def test_complete_file_output(self):
-        """Should save complete recording file."""
-        test_file = Path("tests/fixtures/audio/chunks/chunk_short.wav")
-        if not test_file.exists():
-            pytest.skip("Test audio file not found")
-
-        audio_source = FileAudioSource(test_file)
-        tcp_server = MockTCPServer()
-
-        recorder = ContinuousRecorder(
-            tcp_server=tcp_server,
-            output_dir=str(self.output_dir),
-            filename_prefix="complete_test",
-            silence_threshold=2.0,
-            min_chunk_duration=1.0,
-            max_chunk_duration=30.0,
-            audio_source=audio_source
-        )
-
-        def run_recorder():
-            recorder.start()
-
-        def queue_commands():
-            time.sleep(0.2)
-            tcp_server.commands.append({"command": "start_recording"})
-            time.sleep(0.5)
-            tcp_server.commands.append({"command": "stop_recording"})
-            time.sleep(0.3)
-            tcp_server.commands.append({"command": "shutdown"})
-
-        recorder_thread = threading.Thread(target=run_recorder, daemon=True)
-        command_thread = threading.Thread(target=queue_commands, daemon=True)
-
-        recorder_thread.start()
-        command_thread.start()
-
-        recorder_thread.join(timeout=10.0)
-        command_thread.join(timeout=2.0)
-
-        # Check for complete_file event
-        complete_events = [e for e in tcp_server.events if e["type"] == "complete_file"]
-        assert len(complete_events) >= 1
-
-        # Verify file exists
-        if complete_events:
-            file_path = complete_events[0].get("file_path")
-            assert file_path is not None
-            assert Path(file_path).exists()
+        for event_type in expected_events:
+            assert event_type in event_types
+
+        if stop_first:
+            # Verify output files were created
+            assert list(tmp_path.glob(f"{prefix}*.wav"))
+
+        # Verify the complete recording exists
+        for event in tcp_server.events:
+            if event["type"] == "complete_file":
+                assert event.get("file_path") is not None
+                assert Path(event["file_path"]).exists()
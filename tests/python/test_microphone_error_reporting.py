@@ -2,94 +2,36 @@
 Test that microphone errors are properly reported to Lua.
 """
 import pytest
-import subprocess
 import json
 import time
 import socket
 import threading
 from pathlib import Path
 
+from .mock_microphone import start_main_without_microphone, stop
 
-def test_microphone_error_stays_running():
-    """Python server should STAY RUNNING when microphone fails (not crash)."""
-    # Create a script that mocks microphone failure
-    test_script = '''
-import sys
-from pathlib import Path
-
-# Add recorders/streaming to path so whisper_stream can be imported
-sys.path.insert(0, str(Path.cwd() / "recorders" / "streaming"))
-
-# Mock sounddevice before importing whisper_stream
-class MockSD:
-    class InputStream:
-        def __init__(self, *args, **kwargs):
-            raise RuntimeError("No default input device found")
-        def __enter__(self):
-            return self
-        def __exit__(self, *args):
-            pass
-
-sys.modules['sounddevice'] = MockSD()
 
-# Start TCP client in background to connect
-import socket
-import threading
-import time
+def test_microphone_error_stays_running(tmp_path, tcp_port_base):
+    """Python server should STAY RUNNING when microphone fails (not crash)."""
+    port = tcp_port_base + 2
+    process = start_main_without_microphone(
+        ['--output-dir', str(tmp_path), '--filename-prefix', 'test', '--tcp-port', str(port)],
+        tmp_path / "stderr.log",
+        client_port=port
+    )
 
-def tcp_client():
-    time.sleep(0.5)
+    # Server should still be running after the timeout, not crash
+    process.join(timeout=3)
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.connect(('127.0.0.1', 12400))
-        time.sleep(2)
-        sock.close()
-    except:
-        pass
-
-threading.Thread(target=tcp_client, daemon=True).start()
-
-# Run main
-from whisper_stream import main
-sys.argv = ['whisper_stream.py', '--output-dir', '/tmp/test', '--filename-prefix', 'test', '--tcp-port', '12400']
-main()
-'''
-
-    # Server should timeout (stay running), not crash
-    try:
-        result = subprocess.run(
-            ['python3', '-c', test_script],
-            capture_output=True,
-            timeout=3,
-            cwd=str(Path(__file__).parent.parent.parent)
-        )
-        # If we get here, server exited - that's wrong!
-        pytest.fail(f"Server exited with code {result.returncode}, should have stayed running")
-    except subprocess.TimeoutExpired:
-        # Good! Server stayed running
-        pass
-
-
-def test_microphone_error_sends_tcp_events():
-    """Should send error + recording_stopped events via TCP, then stay running."""
-    import sys
-    from pathlib import Path
-
-    # Add whisper_stream to path
-    sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+        if not process.is_alive():
+            # If we get here, server exited - that's wrong!
+            pytest.fail(f"Server exited with code {process.exitcode}, should have stayed running")
+    finally:
+        stop(process)
 
-    # Mock sounddevice
-    class MockSD:
-        class InputStream:
-            def __init__(self, *args, **kwargs):
-                raise RuntimeError("No default input device found")
-            def __enter__(self):
-                return self
-            def __exit__(self, *args):
-                pass
-
-    sys.modules['sounddevice'] = MockSD()
 
+def test_microphone_error_sends_tcp_events(tmp_path, mock_sounddevice_failure):
+    """Should send error + recording_stopped events via TCP, then stay running."""
     from whisper_stream import ContinuousRecorder
 
     # Create mock TCP server that captures events
@@ -105,7 +47,7 @@ def test_microphone_error_sends_tcp_events():
 
     recorder = ContinuousRecorder(
         tcp_server=MockTCPServer(),
-        output_dir="/tmp/test",
+        output_dir=str(tmp_path),
         filename_prefix="test"
     )
 
@@ -151,26 +93,8 @@ def test_microphone_error_sends_tcp_events():
     assert len(ready_events) == 1, f"Expected 1 ready event (after error), got {len(ready_events)}"
 
 
-def test_error_message_contains_details():
+def test_error_message_contains_details(tmp_path, mock_sounddevice_failure):
     """Error message should contain helpful details."""
-    import sys
-    from pathlib import Path
-
-    sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-
-    class MockSD:
-        class InputStream:
-            def __init__(self, *args, **kwargs):
-                raise RuntimeError("No default input device found")
-
-            def __enter__(self):
-                return self
-
-            def __exit__(self, *args):
-                pass
-
-    sys.modules['sounddevice'] = MockSD()
-
     from whisper_stream import ContinuousRecorder
 
     events = []
@@ -185,7 +109,7 @@ def test_error_message_contains_details():
 
     recorder = ContinuousRecorder(
         tcp_server=MockTCPServer(),
-        output_dir="/tmp/test",
+        output_dir=str(tmp_path),
         filename_prefix="test"
     )
 
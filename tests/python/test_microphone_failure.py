@@ -1,126 +1,48 @@
 """
 Test microphone failure handling.
 """
-import pytest
-import subprocess
-import json
-import sys
-from pathlib import Path
+import time
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
+from .mock_microphone import start_main_without_microphone, stop
 
-def test_microphone_not_available():
-    """Should exit with error code 1 when microphone is not available."""
-    # Try to run whisper_stream.py with microphone (will fail if no mic)
-    # Use a mock that forces sounddevice to fail
 
-    test_script = """
-import sys
-import os
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
-# Mock sounddevice to always fail
-class MockSD:
-    class InputStream:
-        def __init__(self, *args, **kwargs):
-            raise RuntimeError("No default input device found")
-        def __enter__(self):
-            return self
-        def __exit__(self, *args):
-            pass
-
-import sys
-sys.modules['sounddevice'] = MockSD()
-
-# Now run main
-from whisper_stream import main
-import argparse
-
-# Override sys.argv
-sys.argv = [
-    'whisper_stream.py',
-    '--output-dir', '/tmp/test_mic_fail',
-    '--filename-prefix', 'test',
-    '--tcp-port', '12399'
-]
-
-# This should fail because microphone is not available
-try:
-    main()
-    print("SHOULD_HAVE_FAILED", file=sys.stderr)
-    sys.exit(99)  # Should not reach here
-except SystemExit as e:
-    # Capture the exit code
-    sys.exit(e.code)
-"""
-
-    result = subprocess.run(
-        ['python3', '-c', test_script],
-        capture_output=True,
-        cwd=str(Path(__file__).parent.parent.parent),
-        timeout=5
+def test_microphone_not_available(tmp_path, tcp_port_base):
+    """Should report the microphone failure and keep the server running."""
+    port = tcp_port_base + 1
+    stderr_log = tmp_path / "stderr.log"
+    process = start_main_without_microphone(
+        ['--output-dir', str(tmp_path), '--filename-prefix', 'test', '--tcp-port', str(port)],
+        stderr_log,
+        client_port=port
     )
+    try:
+        # The child's TCP client copies received events into the stderr log
+        deadline = time.monotonic() + 5
+        while process.is_alive() and not (stderr_log.exists()
+                                          and "Microphone error" in stderr_log.read_text()):
+            assert time.monotonic() < deadline, "No microphone error event was sent"
+            time.sleep(0.05)
 
-    # Should exit with error code (not 0)
-    # Currently it exits with 0, which is wrong
-    print(f"Exit code: {result.returncode}")
-    print(f"Stderr: {result.stderr.decode()}")
-
-    # This test will FAIL with current implementation
-    # because the error is swallowed and it exits with 0
-    if result.returncode == 0:
-        pytest.fail(
-            "whisper_stream.py exited with code 0 when microphone failed. "
-            "Should exit with code 1 to indicate failure."
-        )
+        assert process.is_alive(), f"Server exited with code {process.exitcode} after the mic failure"
+    finally:
+        stop(process)
 
 
-def test_microphone_failure_sends_error_event():
+def test_microphone_failure_sends_error_event(tmp_path, tcp_port_base):
     """Should send error event via TCP when microphone fails."""
-    # This is harder to test because it requires TCP connection
-    # For now, we verify the error is logged to stderr
-
-    test_script = """
-import sys
-import os
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
-# Mock sounddevice to always fail
-class MockSD:
-    class InputStream:
-        def __init__(self, *args, **kwargs):
-            raise RuntimeError("No default input device found")
-        def __enter__(self):
-            return self
-        def __exit__(self, *args):
-            pass
-
-sys.modules['sounddevice'] = MockSD()
-
-from whisper_stream import main
-sys.argv = [
-    'whisper_stream.py',
-    '--output-dir', '/tmp/test_mic_fail',
-    '--filename-prefix', 'test',
-    '--tcp-port', '12399'
-]
-
-try:
-    main()
-except SystemExit:
-    pass
-"""
-
-    result = subprocess.run(
-        ['python3', '-c', test_script],
-        capture_output=True,
-        cwd=str(Path(__file__).parent.parent.parent),
-        timeout=5
+    # The child's TCP client copies received events into the stderr log
+    port = tcp_port_base + 1
+    stderr_log = tmp_path / "stderr.log"
+    process = start_main_without_microphone(
+        ['--output-dir', str(tmp_path), '--filename-prefix', 'test', '--tcp-port', str(port)],
+        stderr_log,
+        client_port=port
     )
+    process.join(timeout=5)
+    stop(process)
 
-    stderr = result.stderr.decode()
+    stderr = stderr_log.read_text()
 
     # Should contain error message about microphone
     assert "No default input device" in stderr or "error" in stderr.lower()
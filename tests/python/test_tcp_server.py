@@ -6,13 +6,9 @@ import socket
 import json
 import threading
 import time
-import sys
-from pathlib import Path
+from unittest.mock import MagicMock, patch
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-
-from whisper_stream import TCPServer
+from whisper_stream import TCPServer, SOCKET_BUFFER_BYTES
 
 
 class TestTCPServer:
@@ -61,9 +57,20 @@ class TestTCPServer:
         result = server.wait_for_client(timeout=1.0)
         assert result is True
         assert server.client_socket is not None
+        assert server.client_socket.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
 
         client_thread.join()
 
+    def test_accept_requests_socket_buffers(self, server):
+        """Should ask for larger send and receive buffers on the client socket."""
+        client = MagicMock()
+        with patch.object(server, 'server_socket') as listener:
+            listener.accept.return_value = (client, ('127.0.0.1', 1234))
+            assert server.wait_for_client(timeout=0.1) is True
+
+        client.setsockopt.assert_any_call(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_BYTES)
+        client.setsockopt.assert_any_call(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_BYTES)
+
     def test_send_event_no_client(self, server):
         """Should handle send when no client connected."""
         result = server.send_event("test", data="value")
@@ -101,6 +108,19 @@ class TestTCPServer:
         assert event["foo"] == "bar"
         assert event["num"] == 42
 
+    def test_send_event_short_write(self, server):
+        """Should finish a partial sendmsg with sendall of the remaining bytes."""
+        client = MagicMock()
+        client.sendmsg.return_value = 3
+        server.client_socket = client
+
+        assert server.send_event("test_event", num=1) is True
+
+        sent = b"".join(client.sendmsg.call_args[0][0])
+        assert sent.endswith(b"\n")
+        client.sendall.assert_called_once_with(sent[3:])
+        server.client_socket = None
+
     def test_receive_command_no_client(self, server):
         """Should return None when no client connected."""
         result = server.receive_command(timeout=0.1)
@@ -146,6 +166,58 @@ class TestTCPServer:
 
         client_thread.join()
 
+    def test_receive_command_framing(self, server):
+        """Should split batched commands and join commands split across reads."""
+        sent = threading.Event()
+
+        def send_commands():
+            client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            client.connect(('127.0.0.1', server.port))
+            client.sendall(b'{"command": "start_recording"}\n{"command": "stop_')
+            time.sleep(0.2)
+            client.sendall(b'recording"}\n')
+            sent.wait(2.0)
+            client.close()
+
+        client_thread = threading.Thread(target=send_commands)
+        client_thread.start()
+
+        server.wait_for_client(timeout=1.0)
+        assert server.receive_command(timeout=1.0) == {"command": "start_recording"}
+        assert server.receive_command(timeout=1.0) == {"command": "stop_recording"}
+        sent.set()
+
+        client_thread.join()
+
+    def test_wake_ends_receive_wait(self, server):
+        """wake() from another thread should end an unbounded wait."""
+        done = threading.Event()
+
+        def connect_only():
+            client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            client.connect(('127.0.0.1', server.port))
+            done.wait(2.0)
+            client.close()
+
+        client_thread = threading.Thread(target=connect_only)
+        client_thread.start()
+        server.wait_for_client(timeout=1.0)
+
+        result = []
+        receiver = threading.Thread(
+            target=lambda: result.append(server.receive_command(timeout=None)),
+            daemon=True)
+        receiver.start()
+        time.sleep(0.1)
+        server.wake()
+        receiver.join(timeout=2.0)
+        done.set()
+
+        assert not receiver.is_alive(), "wake() did not end the receive wait"
+        assert result == [None]
+
+        client_thread.join()
+
     def test_close_cleans_up(self, server):
         """Should close all sockets."""
         server.close()